@@ -0,0 +1,80 @@
+import re
+import sqlite3
+import threading
+import time
+
+# Common suffixes stripped from each word so "symptoms" and "symptom" share a key
+SUFFIXES = ('ing', 'es', 's')
+
+# Function to normalize a question into a cache key
+def normalize_query(query):
+    words = re.sub(r'[^a-z0-9\s]', ' ', query.lower()).split()
+    stemmed = []
+    for word in words:
+        for suffix in SUFFIXES:
+            if len(word) > len(suffix) + 2 and word.endswith(suffix):
+                word = word[:-len(suffix)]
+                break
+        stemmed.append(word)
+    return ' '.join(stemmed)
+
+
+# SQLite backed answer cache with LRU eviction and a TTL.
+# Keys are prefixed with the namespace (the LLM provider's name), so answers from one
+# provider, such as the offline stub, are never served while another is in use.
+class AnswerCache:
+    def __init__(self, path='answer_cache.db', max_entries=1000, ttl_seconds=7 * 24 * 3600, namespace=''):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS answers ('
+            'key TEXT PRIMARY KEY, answer TEXT NOT NULL, '
+            'created_at REAL NOT NULL, last_access REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS answers_last_access ON answers (last_access)')
+        self._conn.commit()
+
+    def _key(self, query):
+        return f'{self.namespace}:{normalize_query(query)}'
+
+    def get(self, query):
+        key = self._key(query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT answer, created_at FROM answers WHERE key = ?', (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute('DELETE FROM answers WHERE key = ?', (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE answers SET last_access = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, query, answer):
+        key = self._key(query)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO answers (key, answer, created_at, last_access) VALUES (?, ?, ?, ?)',
+                (key, answer, now, now)
+            )
+            # Evict the least recently used entries beyond the size limit
+            self._conn.execute(
+                'DELETE FROM answers WHERE key IN ('
+                'SELECT key FROM answers ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute('SELECT COUNT(*) FROM answers').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'size': size}
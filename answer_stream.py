@@ -0,0 +1,26 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Function to turn model chunks into text while recording stream timings.
+# Fills `timings` with time_to_first_token, total_time and the full answer once done.
+def timed_stream(chunks, timings):
+    start = time.perf_counter()
+    parts = []
+    for chunk in chunks:
+        text = getattr(chunk, 'content', chunk)
+        if not text:
+            continue
+        if not parts:
+            timings['time_to_first_token'] = time.perf_counter() - start
+        parts.append(text)
+        yield text
+
+    timings['total_time'] = time.perf_counter() - start
+    timings.setdefault('time_to_first_token', timings['total_time'])
+    timings['answer'] = ''.join(parts)
+    logger.info(
+        "LLM stream: first token %.3fs, total %.3fs, %d chunks",
+        timings['time_to_first_token'], timings['total_time'], len(parts)
+    )
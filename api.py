@@ -0,0 +1,379 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import sys
+import time
+from datetime import date
+from email.utils import formatdate
+from functools import lru_cache
+from itertools import combinations
+from urllib.parse import parse_qs, urlsplit
+
+from content_bundle import TRIMESTERS, get_content_store
+from diet_filters import RESTRICTION_MASKS, FoodFilter, restriction_mask
+from pregnancy_dates import CALCULATION_TYPES, due_dates, weeks_of_pregnancy
+from recommendations import MEAL_PREFERENCES, diet_recommendations, exercise_recommendations, meal_plan
+from week_content import build_week_store
+
+logger = logging.getLogger(__name__)
+
+# Seconds clients and proxies may reuse a response before revalidating it with If-None-Match
+CONTENT_MAX_AGE = 300
+# Answers for a fixed as_of date never change
+FIXED_DATE_MAX_AGE = 86400
+MAX_HEADER_BYTES = 8192
+# Seconds a connection may sit idle, or take to send a request, before it is closed
+IDLE_TIMEOUT = 15
+# Exercise type subsets grow as 2^n, so only the most requested ones are kept built
+EXERCISE_CACHE_SIZE = 256
+# Weeks of pregnancy the tracker page accepts; other weeks are reported as null
+TRACKED_WEEKS = range(1, 42)
+# Longest week number looked up, so huge digit strings are never passed to int()
+MAX_WEEK_DIGITS = 3
+
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+
+# Trimester names accepted in query strings, besides the full names
+TRIMESTER_ALIASES = {alias: trimester for trimester, aliases in zip(TRIMESTERS, (('1', 'first'), ('2', 'second'), ('3', 'third'))) for alias in aliases}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# JSON response serialized once, with its ETag, ready to write for every request that maps to it
+class Response:
+    def __init__(self, status, payload, max_age=CONTENT_MAX_AGE, extra_headers=()):
+        self.status = status
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        # Only cacheable responses get a validator
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:24]}"' if status == 200 and max_age else None
+
+        headers = [('Content-Type', 'application/json; charset=utf-8'), ('Content-Length', str(len(self.body)))]
+        validators = [('Cache-Control', f'public, max-age={max_age}' if max_age else 'no-store')]
+        if self.etag:
+            validators.insert(0, ('ETag', self.etag))
+        self.head = self._head(status, headers + validators + list(extra_headers))
+        self.not_modified_head = self._head(304, validators)
+
+    @staticmethod
+    def _head(status, headers):
+        return (f'HTTP/1.1 {status} {REASONS[status]}\r\n' + ''.join(f'{name}: {value}\r\n' for name, value in headers)).encode('latin-1')
+
+    # Function to check an If-None-Match header against this response's ETag (weak comparison)
+    def matches(self, if_none_match):
+        if self.etag is None or not if_none_match:
+            return False
+        return any(tag.strip() in ('*', self.etag, 'W/' + self.etag) for tag in if_none_match.split(','))
+
+    # Function to return the byte chunks to send, answering 304 when the client's copy is current
+    def chunks(self, date_header, connection_header=b'', head_only=False, if_none_match=None):
+        if self.matches(if_none_match):
+            return [self.not_modified_head, date_header, connection_header, b'\r\n']
+        if head_only:
+            return [self.head, date_header, connection_header, b'\r\n']
+        return [self.head, date_header, connection_header, b'\r\n', self.body]
+
+NOT_FOUND = Response(404, {'error': 'Not found'}, max_age=0)
+METHOD_NOT_ALLOWED = Response(405, {'error': 'Only GET and HEAD are supported'}, max_age=0, extra_headers=[('Allow', 'GET, HEAD')])
+HEALTH = Response(200, {'status': 'ok'}, max_age=0)
+INTERNAL_ERROR = Response(500, {'error': 'Internal server error'}, max_age=0)
+
+
+# Functions to read and validate query string parameters
+def single_param(params, name, default=None):
+    values = params.get(name)
+    return values[-1].strip() if values else default
+
+def list_param(params, name):
+    return [value.strip() for values in params.get(name, []) for value in values.split(',') if value.strip()]
+
+def parse_date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f'"{name}" must be a date in YYYY-MM-DD format')
+
+def parse_trimester(params):
+    value = single_param(params, 'trimester')
+    if value is None:
+        raise ApiError(400, '"trimester" is required')
+    trimester = TRIMESTER_ALIASES.get(value.lower()) or next((name for name in TRIMESTERS if name.lower() == value.lower()), None)
+    if trimester is None:
+        raise ApiError(400, f'Unknown trimester "{value}". Use 1, 2, 3 or one of: {", ".join(TRIMESTERS)}')
+    return trimester
+
+def parse_restrictions(params):
+    restrictions = [value.lower() for value in list_param(params, 'restrictions') if value.lower() != 'none']
+    unknown = [value for value in restrictions if value not in RESTRICTION_MASKS]
+    if unknown:
+        raise ApiError(400, f'Unknown dietary restrictions: {", ".join(unknown)}. Use any of: {", ".join(RESTRICTION_MASKS)}')
+    return restriction_mask(restrictions)
+
+def parse_meal_preference(params):
+    value = single_param(params, 'meal_preference', 'Flexible')
+    preference = next((name for name in MEAL_PREFERENCES if name.lower() == value.lower()), None)
+    if preference is None:
+        raise ApiError(400, f'Unknown meal preference "{value}". Use one of: {", ".join(MEAL_PREFERENCES)}')
+    return preference
+
+
+# Function to build the payload of one week, without the page's HTML fragments
+def week_payload(entry):
+    return {key: entry[key] for key in ('week', 'baby_development', 'symptoms', 'checklist', 'images')}
+
+# Function to compute the due date and current week for a start date, caching the serialized answer.
+# Callers pass today's date when as_of is not given, so cached answers roll over at midnight.
+# The week is null when as_of falls outside the pregnancy (before it starts or long after the due date).
+@lru_cache(maxsize=4096)
+def due_date_response(start_date, calculation_type, as_of, fixed_as_of):
+    due_date = due_dates([start_date], calculation_type)[0]
+    week = int(weeks_of_pregnancy([start_date], calculation_type, as_of)[0])
+    return Response(200, {
+        'start_date': start_date,
+        'calculation_type': calculation_type,
+        'due_date': str(due_date),
+        'week': week if week in TRACKED_WEEKS else None,
+        'as_of': as_of,
+    }, max_age=FIXED_DATE_MAX_AGE if fixed_as_of else CONTENT_MAX_AGE)
+
+
+# The API's routes. Content responses are serialized once per content version (up front, or on
+# first request for exercise type subsets), so a request costs a lookup; they are rebuilt when a source CSV changes.
+class ContentApi:
+    def __init__(self, store=None):
+        self.store = store or get_content_store()
+        self.version = None
+        self.refresh()
+
+    def refresh(self):
+        bundle = self.store.current()
+        if bundle.version != self.version:
+            start = time.perf_counter()
+            self._build(bundle)
+            self.version = bundle.version
+            logger.info("Built API responses for content %s in %.3fs", bundle.version, time.perf_counter() - start)
+
+    def _build(self, bundle):
+        week_store = build_week_store(bundle.frame('weeks'))
+        self.weeks = {week: Response(200, week_payload(entry)) for week, entry in week_store.items()}
+        self.weeks_index = Response(200, {'weeks': [week_payload(entry) for _, entry in sorted(week_store.items())]})
+
+        # Restriction subsets that exclude the same attributes share one entry, as in quiz_results.py
+        diet_filter = FoodFilter(bundle.frame('diet'), 'examples')
+        meal_filter = FoodFilter(bundle.frame('diet_chart'), 'food')
+        self.diets = {}
+        for size in range(len(RESTRICTION_MASKS) + 1):
+            for restrictions in combinations(RESTRICTION_MASKS, size):
+                mask = restriction_mask(restrictions)
+                for trimester in TRIMESTERS:
+                    if (trimester, mask, MEAL_PREFERENCES[0]) in self.diets:
+                        continue
+                    food_groups = diet_recommendations(diet_filter, trimester, restrictions).to_dict('records')
+                    for preference in MEAL_PREFERENCES:
+                        meals = meal_plan(meal_filter, trimester, restrictions, preference).to_dict('records')
+                        self.diets[(trimester, mask, preference)] = Response(200, {
+                            'trimester': trimester,
+                            'meal_preference': preference,
+                            'food_groups': food_groups,
+                            'meals': meals,
+                        })
+
+        self.exercise_data = bundle.frame('exercises')
+        self.exercise_types = list(dict.fromkeys(self.exercise_data['exercise_type']))
+        # Built on first request and kept per content version, keyed by the sorted type names
+        self.exercise_response = lru_cache(maxsize=EXERCISE_CACHE_SIZE)(self._exercise_response)
+
+    def _exercise_response(self, trimester, types):
+        records = exercise_recommendations(self.exercise_data, trimester, types).to_dict('records')
+        return Response(200, {
+            'trimester': trimester,
+            'exercises': [dict(record, video_url=f"https://www.youtube.com/watch?v={record['video_id']}") for record in records],
+        })
+
+    def due_date(self, params):
+        start_date = parse_date(single_param(params, 'date'), 'date').isoformat()
+        calculation_type = CALCULATION_TYPES.get(single_param(params, 'type', 'lmp'))
+        if calculation_type is None:
+            raise ApiError(400, '"type" must be "lmp" or "conception"')
+        as_of = single_param(params, 'as_of')
+        fixed_as_of = as_of is not None
+        as_of = parse_date(as_of, 'as_of').isoformat() if fixed_as_of else date.today().isoformat()
+        return due_date_response(start_date, calculation_type, as_of, fixed_as_of)
+
+    def week(self, number):
+        response = self.weeks.get(int(number)) if number.isdigit() and len(number) <= MAX_WEEK_DIGITS else None
+        if response is None:
+            raise ApiError(404, f'No content for week {number}. Weeks {min(self.weeks)} to {max(self.weeks)} are available')
+        return response
+
+    def diet(self, params):
+        return self.diets[(parse_trimester(params), parse_restrictions(params), parse_meal_preference(params))]
+
+    def exercise_list(self, params):
+        trimester = parse_trimester(params)
+        requested = [value.lower() for value in list_param(params, 'types')]
+        known = {exercise_type.lower(): exercise_type for exercise_type in self.exercise_types}
+        unknown = [value for value in requested if value not in known]
+        if unknown:
+            raise ApiError(400, f'Unknown exercise types: {", ".join(unknown)}. Use any of: {", ".join(self.exercise_types)}')
+        types = {known[value] for value in requested} or set(self.exercise_types)
+        return self.exercise_response(trimester, tuple(sorted(types)))
+
+    # Function to map a request target to its response
+    def handle(self, target):
+        self.refresh()
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        params = parse_qs(url.query) if url.query else {}
+        try:
+            if path == '/v1/due-date':
+                return self.due_date(params)
+            if path == '/v1/weeks':
+                return self.weeks_index
+            if path.startswith('/v1/weeks/'):
+                return self.week(path[len('/v1/weeks/'):])
+            if path == '/v1/diet':
+                return self.diet(params)
+            if path == '/v1/exercises':
+                return self.exercise_list(params)
+            if path == '/health':
+                return HEALTH
+            return NOT_FOUND
+        except ApiError as e:
+            return Response(e.status, {'error': str(e)}, max_age=0)
+
+
+_date_header = (0, b'')
+
+# Function to get the Date header line, formatted at most once per second
+def date_header():
+    global _date_header
+    now = int(time.time())
+    if _date_header[0] != now:
+        _date_header = (now, f'Date: {formatdate(now, usegmt=True)}\r\n'.encode('latin-1'))
+    return _date_header[1]
+
+# Function to serve one keep-alive connection, answering pipelined requests in order.
+# A connection that sends nothing, or only part of a request, for idle_timeout seconds is closed.
+async def serve_connection(api, reader, writer, idle_timeout=IDLE_TIMEOUT):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            # A timer that drops the connection, rather than asyncio.wait_for, which costs a task per request.
+            # Closing the transport ends the pending read with IncompleteReadError.
+            timer = loop.call_later(idle_timeout, writer.transport.abort)
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except asyncio.LimitOverrunError:
+                writer.writelines(Response(431, {'error': 'Request headers too large'}, max_age=0).chunks(date_header(), b'Connection: close\r\n'))
+                break
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            finally:
+                timer.cancel()
+
+            lines = head.decode('latin-1').split('\r\n')
+            request_line = lines[0].split(' ')
+            if len(request_line) != 3:
+                writer.writelines(Response(400, {'error': 'Malformed request line'}, max_age=0).chunks(date_header(), b'Connection: close\r\n'))
+                break
+            method, target, version = request_line
+            headers = {}
+            for line in lines[1:]:
+                name, separator, value = line.partition(':')
+                if separator:
+                    headers[name.strip().lower()] = value.strip()
+
+            # Request bodies are not used, but must be read past to reach the next request
+            length = headers.get('content-length', '0')
+            if not length.isdigit():
+                break
+            if int(length):
+                timer = loop.call_later(idle_timeout, writer.transport.abort)
+                try:
+                    await reader.readexactly(int(length))
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                finally:
+                    timer.cancel()
+
+            connection = headers.get('connection', '').lower()
+            if version == 'HTTP/1.1':
+                keep_alive = connection != 'close'
+                connection_header = b'' if keep_alive else b'Connection: close\r\n'
+            else:
+                keep_alive = connection == 'keep-alive'
+                connection_header = b'Connection: keep-alive\r\n' if keep_alive else b'Connection: close\r\n'
+
+            if method in ('GET', 'HEAD'):
+                try:
+                    response = api.handle(target)
+                except Exception:
+                    logger.exception("Error handling %s", target)
+                    response = INTERNAL_ERROR
+            else:
+                response = METHOD_NOT_ALLOWED
+            writer.writelines(response.chunks(date_header(), connection_header, method == 'HEAD', headers.get('if-none-match')))
+            if not keep_alive:
+                break
+            # Only wait for the socket when the client is not keeping up
+            if writer.transport.get_write_buffer_size() > 65536:
+                await writer.drain()
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def run_server(host, port, reuse_port=False, ready=None, idle_timeout=IDLE_TIMEOUT):
+    api = ContentApi()
+    server = await asyncio.start_server(
+        lambda reader, writer: serve_connection(api, reader, writer, idle_timeout),
+        host, port, limit=MAX_HEADER_BYTES, reuse_port=reuse_port, backlog=1024
+    )
+    if ready is not None:
+        ready(server)
+    async with server:
+        await server.serve_forever()
+
+def run_worker(host, port, reuse_port):
+    try:
+        asyncio.run(run_server(host, port, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the tracker, week content, diet and exercise data as a JSON API.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8000, help='port to listen on')
+    parser.add_argument('--workers', type=int, default=1, help='processes sharing the port (one per core)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(processName)s %(message)s')
+    print(f"Serving the JSON API on http://{args.host}:{args.port} with {args.workers} worker(s)")
+    if args.workers == 1:
+        run_worker(args.host, args.port, False)
+        return 0
+
+    # Each worker listens on the same port (SO_REUSEPORT) and the kernel spreads connections between them
+    workers = [multiprocessing.Process(target=run_worker, args=(args.host, args.port, True), name=f'worker-{n}') for n in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
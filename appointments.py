@@ -0,0 +1,214 @@
+import bisect
+import itertools
+import sqlite3
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+
+# Standard prenatal visits as (week of pregnancy, description)
+STANDARD_VISITS = [
+    (8, 'First prenatal visit and dating ultrasound'),
+    (12, 'First trimester screening'),
+    (16, 'Prenatal checkup'),
+    (20, 'Anatomy scan'),
+    (24, 'Prenatal checkup'),
+    (28, 'Glucose screening and checkup'),
+    (30, 'Prenatal checkup'),
+    (32, 'Prenatal checkup'),
+    (34, 'Prenatal checkup'),
+    (36, 'Group B strep test and checkup'),
+    (37, 'Weekly checkup'),
+    (38, 'Weekly checkup'),
+    (39, 'Weekly checkup'),
+    (40, 'Due date checkup'),
+]
+
+
+class Appointment:
+    _ids = itertools.count(1)
+
+    def __init__(self, start, end, title, patient_id=None, location=None, id=None):
+        if end <= start:
+            raise ValueError('An appointment must end after it starts.')
+        self.id = next(Appointment._ids) if id is None else id
+        self.start = start
+        self.end = end
+        self.title = title
+        self.patient_id = patient_id
+        self.location = location
+
+    @property
+    def sort_key(self):
+        return (self.start, self.id)
+
+
+# Function to generate the standard visit schedule from a due date (week 40)
+def generate_schedule(due_date, patient_id=None, visit_time=time(9, 0), duration_minutes=30):
+    due_day = due_date.date() if isinstance(due_date, datetime) else due_date
+    schedule = []
+    for week, title in STANDARD_VISITS:
+        start = datetime.combine(due_day - timedelta(weeks=40 - week), visit_time)
+        schedule.append(Appointment(start, start + timedelta(minutes=duration_minutes), f'Week {week}: {title}', patient_id))
+    return schedule
+
+
+# Appointments kept sorted by start time, so lookups by time are binary searches.
+# Tracking the longest duration bounds how far back an overlapping appointment can start.
+class AppointmentBook:
+    def __init__(self, appointments=()):
+        self._keys = []
+        self._appointments = []
+        self._max_duration = timedelta(0)
+        for appointment in appointments:
+            self.add(appointment)
+
+    def __len__(self):
+        return len(self._appointments)
+
+    def __iter__(self):
+        return iter(self._appointments)
+
+    def add(self, appointment):
+        index = bisect.bisect_right(self._keys, appointment.sort_key)
+        self._keys.insert(index, appointment.sort_key)
+        self._appointments.insert(index, appointment)
+        self._max_duration = max(self._max_duration, appointment.end - appointment.start)
+        return appointment
+
+    def remove(self, appointment):
+        index = bisect.bisect_left(self._keys, appointment.sort_key)
+        if index < len(self._keys) and self._appointments[index] is appointment:
+            del self._keys[index]
+            del self._appointments[index]
+
+    # Function to return the next `count` appointments starting at or after `after`
+    def next_appointments(self, count, after=None):
+        after = after or datetime.now()
+        index = bisect.bisect_left(self._keys, (after,))
+        return self._appointments[index:index + count]
+
+    # Function to return the appointments that overlap the time range [start, end)
+    def overlapping(self, start, end):
+        first = bisect.bisect_right(self._keys, (start - self._max_duration,))
+        last = bisect.bisect_left(self._keys, (end,))
+        return [appointment for appointment in self._appointments[first:last] if appointment.end > start]
+
+    def between(self, start, end):
+        first = bisect.bisect_left(self._keys, (start,))
+        last = bisect.bisect_left(self._keys, (end,))
+        return self._appointments[first:last]
+
+
+# SQLite store of appointment calendars, each with the due date its schedule was generated for.
+# Appointments are indexed by calendar and start time, so a calendar loads already sorted.
+class AppointmentStore:
+    def __init__(self, path='appointments.db'):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            '''
+            CREATE TABLE IF NOT EXISTS calendars (
+                calendar_id TEXT PRIMARY KEY,
+                due_date TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS appointments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                calendar_id TEXT NOT NULL,
+                start TEXT NOT NULL,
+                end TEXT NOT NULL,
+                title TEXT NOT NULL,
+                patient_id TEXT,
+                location TEXT
+            );
+            CREATE INDEX IF NOT EXISTS appointments_calendar_start ON appointments (calendar_id, start);
+            '''
+        )
+        self._conn.commit()
+
+    def _insert(self, calendar_id, appointment):
+        cursor = self._conn.execute(
+            'INSERT INTO appointments (calendar_id, start, end, title, patient_id, location) VALUES (?, ?, ?, ?, ?, ?)',
+            (calendar_id, appointment.start.isoformat(), appointment.end.isoformat(), appointment.title,
+             appointment.patient_id, appointment.location)
+        )
+        # The row id keeps calendar UIDs stable across restarts
+        appointment.id = cursor.lastrowid
+
+    # Function to load a calendar as (due date, AppointmentBook); the due date is None for an unknown calendar
+    def load(self, calendar_id):
+        with self._lock:
+            row = self._conn.execute('SELECT due_date FROM calendars WHERE calendar_id = ?', (calendar_id,)).fetchone()
+            rows = self._conn.execute(
+                'SELECT id, start, end, title, patient_id, location FROM appointments WHERE calendar_id = ? ORDER BY start, id',
+                (calendar_id,)
+            ).fetchall()
+        appointments = [
+            Appointment(datetime.fromisoformat(start), datetime.fromisoformat(end), title, patient_id, location, id)
+            for id, start, end, title, patient_id, location in rows
+        ]
+        return (date.fromisoformat(row[0]) if row else None), AppointmentBook(appointments)
+
+    # Function to replace a calendar's appointments, e.g. with the schedule for a new due date
+    def replace(self, calendar_id, due_date, appointments):
+        with self._lock:
+            self._conn.execute('DELETE FROM appointments WHERE calendar_id = ?', (calendar_id,))
+            self._conn.execute(
+                'INSERT INTO calendars (calendar_id, due_date) VALUES (?, ?) '
+                'ON CONFLICT (calendar_id) DO UPDATE SET due_date = excluded.due_date',
+                (calendar_id, due_date.isoformat())
+            )
+            for appointment in appointments:
+                self._insert(calendar_id, appointment)
+            self._conn.commit()
+
+    def add(self, calendar_id, appointment):
+        with self._lock:
+            self._insert(calendar_id, appointment)
+            self._conn.commit()
+        return appointment
+
+
+# Function to escape text values for iCalendar
+def escape_ical_text(value):
+    return str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+# Function to fold iCalendar content lines to 75 octets
+def fold_ical_line(line):
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        # Never split inside a multi-byte character
+        while limit < len(encoded) and (encoded[limit] & 0xC0) == 0x80:
+            limit -= 1
+        parts.append(encoded[:limit].decode('utf-8'))
+        encoded = encoded[limit:]
+    return '\r\n '.join(parts) + '\r\n'
+
+def format_ical_time(value):
+    return value.strftime('%Y%m%dT%H%M%S')
+
+# Function to export appointments as iCalendar, one line at a time, so large calendars never sit in memory
+def iter_ical(appointments, calendar_name='Glowing Journey'):
+    yield 'BEGIN:VCALENDAR\r\n'
+    yield 'VERSION:2.0\r\n'
+    yield 'PRODID:-//Glowing Journey//Appointments//EN\r\n'
+    yield fold_ical_line(f'X-WR-CALNAME:{escape_ical_text(calendar_name)}')
+    stamp = format_ical_time(datetime.now(timezone.utc)) + 'Z'
+    for appointment in appointments:
+        yield 'BEGIN:VEVENT\r\n'
+        yield f'UID:{appointment.patient_id or "appointment"}-{appointment.id}-{format_ical_time(appointment.start)}@glowing-journey\r\n'
+        yield f'DTSTAMP:{stamp}\r\n'
+        yield f'DTSTART:{format_ical_time(appointment.start)}\r\n'
+        yield f'DTEND:{format_ical_time(appointment.end)}\r\n'
+        yield fold_ical_line(f'SUMMARY:{escape_ical_text(appointment.title)}')
+        if appointment.location:
+            yield fold_ical_line(f'LOCATION:{escape_ical_text(appointment.location)}')
+        yield 'END:VEVENT\r\n'
+    yield 'END:VCALENDAR\r\n'
+
+# Function to stream appointments to a file as iCalendar
+def write_ical(appointments, file, calendar_name='Glowing Journey'):
+    for line in iter_ical(appointments, calendar_name):
+        file.write(line)
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from bench_utils import ROOT, summarize
+
+# Request mix sent by every simulated client
+API_TARGETS = [
+    '/v1/due-date?date=2026-03-01&type=lmp',
+    '/v1/due-date?date=2026-01-15&type=conception&as_of=2026-06-01',
+    '/v1/weeks/12',
+    '/v1/weeks/30',
+    '/v1/diet?trimester=2&restrictions=vegan,gluten-free&meal_preference=3%20main%20meals',
+    '/v1/diet?trimester=1',
+    '/v1/exercises?trimester=3&types=core,stretching',
+    '/v1/exercises?trimester=2',
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+# Function to start the API in its own process(es) and wait until it answers
+def start_api(port, workers=1, timeout=60):
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'api.py'), '--port', str(port), '--workers', str(workers)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError('The API server exited during startup')
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('The API server did not start in time')
+
+# Function to send requests over one keep-alive connection, revalidating every other request with its ETag
+async def client(port, requests, offset, latencies, statuses):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    etags = {}
+    try:
+        for n in range(requests):
+            target = API_TARGETS[(offset + n) % len(API_TARGETS)]
+            conditional = f'If-None-Match: {etags[target]}\r\n' if n % 2 and target in etags else ''
+            start = time.perf_counter()
+            writer.write(f'GET {target} HTTP/1.1\r\nHost: localhost\r\n{conditional}\r\n'.encode('latin-1'))
+            head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+            headers = dict(line.split(': ', 1) for line in head.split('\r\n')[1:] if ': ' in line)
+            if 'Content-Length' in headers:
+                await reader.readexactly(int(headers['Content-Length']))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            status = int(head.split(' ', 2)[1])
+            statuses[status] = statuses.get(status, 0) + 1
+            if 'ETag' in headers:
+                etags[target] = headers['ETag']
+    finally:
+        writer.close()
+
+async def load(port, connections, requests):
+    latencies = []
+    statuses = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, requests, n, latencies, statuses) for n in range(connections)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+# Function to measure the API's request latency and throughput with `connections` keep-alive clients
+def run_api_benchmarks(connections=32, requests=500, workers=1):
+    port = free_port()
+    process = start_api(port, workers)
+    try:
+        latencies, statuses, wall = asyncio.run(load(port, connections, requests))
+    finally:
+        process.terminate()
+        process.wait()
+
+    summary = summarize(latencies)
+    summary['requests_per_second'] = round(len(latencies) / wall, 1)
+    summary['not_modified_share'] = round(statuses.get(304, 0) / len(latencies), 3)
+    summary['errors'] = sum(count for status, count in statuses.items() if status >= 400)
+    return {f'api.keep_alive.workers_{workers}': summary}
@@ -0,0 +1,85 @@
+import ast
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+PAGES = {
+    'tracker': os.path.join(ROOT, 'pages', '1_Pregnancy_Tracker.py'),
+    'assistant': os.path.join(ROOT, 'pages', '2_Pregnancy_AI_Assistant.py'),
+    'diet': os.path.join(ROOT, 'pages', '3_Diet_And_Exercises.py'),
+}
+
+
+# Function to pull named function definitions out of a page script without running the page.
+# Functions nested in top-level `with` blocks (such as the pages' `with start_rerun(...)`) are found too.
+# Decorators such as st.cache_resource are dropped; `namespace` supplies the globals they use.
+def load_page_functions(path, names, namespace):
+    with open(path) as file:
+        tree = ast.parse(file.read(), filename=path)
+    nodes = list(tree.body)
+    functions = []
+    while nodes:
+        node = nodes.pop(0)
+        if isinstance(node, ast.With):
+            nodes[:0] = node.body
+        elif isinstance(node, ast.FunctionDef) and node.name in names:
+            functions.append(node)
+    for function in functions:
+        function.decorator_list = []
+    exec(compile(ast.Module(body=functions, type_ignores=[]), path, 'exec'), namespace)
+    return [namespace[name] for name in names]
+
+# Function to time repeated calls of func, returning per-call durations in ms
+def time_calls(func, repeat=200, warmup=5):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+# Function to summarize durations in ms
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'runs': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered), 4),
+        'median_ms': round(statistics.median(ordered), 4),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        'min_ms': round(ordered[0], 4),
+        'max_ms': round(ordered[-1], 4),
+    }
+
+def environment():
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+    }
+
+def write_results(results, path):
+    with open(path, 'w') as file:
+        json.dump({'environment': environment(), 'results': results}, file, indent=2)
+
+# Function to list benchmarks whose median slowed down by more than `tolerance` against a baseline file
+def compare_results(results, baseline_path, tolerance=0.2):
+    with open(baseline_path) as file:
+        baseline = json.load(file)['results']
+    regressions = []
+    for name, summary in results.items():
+        before = baseline.get(name)
+        if before and before['median_ms'] > 0:
+            change = summary['median_ms'] / before['median_ms'] - 1
+            if change > tolerance:
+                regressions.append((name, before['median_ms'], summary['median_ms'], change))
+    return regressions
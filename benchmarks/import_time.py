@@ -0,0 +1,80 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import-time budget for each page, in milliseconds
+PAGE_BUDGETS_MS = {
+    'Home.py': 900,
+    'pages/1_Pregnancy_Tracker.py': 1800,
+    'pages/2_Pregnancy_AI_Assistant.py': 1200,
+    'pages/3_Diet_And_Exercises.py': 1600,
+}
+
+# Function to collect the top-level import statements of a page
+def page_imports(path):
+    with open(os.path.join(ROOT, path)) as file:
+        tree = ast.parse(file.read(), filename=path)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+# Function to run code in a fresh interpreter under -X importtime and return its top-level imports
+def top_level_imports(code):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented further than the single space after the separator
+        if not name.startswith('  '):
+            imports.append((name.strip(), int(cumulative) / 1000))
+    return imports
+
+# Function to measure a page's imports, excluding what the interpreter imports at startup.
+# Returns the total cumulative import time in ms and the slowest top-level imports.
+def measure_page(path, startup_modules):
+    try:
+        imports = top_level_imports('\n'.join(page_imports(path)))
+    except RuntimeError as e:
+        raise RuntimeError(f"Importing the modules of {path} failed: {e}")
+    imports = sorted((entry for entry in imports if entry[0] not in startup_modules), key=lambda entry: entry[1], reverse=True)
+    return sum(ms for _, ms in imports), imports[:5]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the cold import time of each page against its budget.')
+    parser.add_argument('--runs', type=int, default=3, help='runs per page; the fastest is kept')
+    parser.add_argument('--json', help='write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    startup_modules = {name for name, _ in top_level_imports('pass')}
+    results = {}
+    over_budget = False
+    for path, budget in PAGE_BUDGETS_MS.items():
+        total, slowest = min((measure_page(path, startup_modules) for _ in range(args.runs)), key=lambda run: run[0])
+        within = total <= budget
+        over_budget |= not within
+        results[path] = {'import_ms': round(total, 1), 'budget_ms': budget, 'within_budget': within,
+                         'slowest': [{'module': name, 'ms': round(ms, 1)} for name, ms in slowest]}
+        print(f"{'ok  ' if within else 'OVER'} {path}: {total:.0f} ms (budget {budget} ms)")
+        for name, ms in slowest:
+            print(f"       {name}: {ms:.0f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
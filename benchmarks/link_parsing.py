@@ -0,0 +1,54 @@
+import glob
+import os
+import sys
+import tracemalloc
+
+from bench_utils import ROOT, summarize, time_calls
+
+from search_provider import FIXTURE_DIR, extract_links, iter_file
+
+
+# The pages in fixtures/search are synthetic, not captured from a search engine: they are generated
+# to match the size and markup of a results page (about 140 KB, results under div.tF2Cxc after the
+# head's inline styles and scripts). Timings on real pages will differ with their actual markup.
+
+# Function to parse the whole page into a BeautifulSoup tree, as scrape_links used to
+def soup_links(path, limit=3):
+    from bs4 import BeautifulSoup
+
+    with open(path, encoding='utf-8') as file:
+        soup = BeautifulSoup(file.read(), 'html.parser')
+    return [result.find('a')['href'] for result in soup.find_all('div', class_='tF2Cxc')][:limit]
+
+# Function to parse the page as it streams in, stopping at the limit
+def stream_links(path, limit=3):
+    return extract_links(iter_file(path), limit)
+
+# Function to measure the peak memory allocated by one call, in KiB
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+# Function to compare both parsers on every synthetic result page
+def run_link_parsing_benchmarks(repeat=200):
+    try:
+        import bs4  # noqa: F401
+        parsers = {'soup': soup_links, 'stream': stream_links}
+    except ImportError:
+        print("beautifulsoup4 is not installed; timing the streaming parser only", file=sys.stderr)
+        parsers = {'stream': stream_links}
+
+    results = {}
+    for path in sorted(glob.glob(os.path.join(ROOT, FIXTURE_DIR, '*.html'))):
+        page = os.path.splitext(os.path.basename(path))[0]
+        for name, parser in parsers.items():
+            summary = summarize(time_calls(lambda: parser(path), max(repeat // 10, 10)))
+            summary['peak_kib'] = peak_memory(lambda: parser(path))
+            summary['page_kib'] = round(os.path.getsize(path) / 1024, 1)
+            results[f'parse.{page}.{name}'] = summary
+    return results
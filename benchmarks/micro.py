@@ -0,0 +1,76 @@
+import itertools
+import os
+
+import pandas as pd
+import plotly.io
+import plotly.tools
+
+from bench_utils import PAGES, ROOT, load_page_functions, summarize, time_calls
+
+import pregnancy_dates
+from diet_filters import FoodFilter
+from recommendations import diet_recommendations, exercise_recommendations, meal_plan
+from tracker_charts import build_week_charts, doughnut_chart_for_week
+
+
+def tracker_functions():
+    namespace = {name: getattr(pregnancy_dates, name) for name in ('CONCEPTION', 'LMP', 'as_datetime', 'due_dates', 'weeks_of_pregnancy')}
+    return load_page_functions(PAGES['tracker'], ['calculate_week_of_pregnancy'], namespace)
+
+def diet_functions():
+    diet_filter = FoodFilter(pd.read_csv(os.path.join(ROOT, 'diet_nutrition.csv')), 'examples')
+    meal_filter = FoodFilter(pd.read_csv(os.path.join(ROOT, 'sample_diet_chart.csv')), 'food')
+    namespace = {
+        'pd': pd,
+        'FoodFilter': FoodFilter,
+        'diet_recommendations': diet_recommendations,
+        'meal_plan': meal_plan,
+        'exercise_recommendations': exercise_recommendations,
+        'diet_filter': diet_filter,
+        'meal_filter': meal_filter,
+        'diet_data': diet_filter.data,
+        'diet_chart_data': meal_filter.data,
+        'exercise_data': pd.read_csv(os.path.join(ROOT, 'exercise_routines.csv')),
+    }
+    functions = load_page_functions(
+        PAGES['diet'],
+        ['get_custom_diet_recommendations', 'filter_meals', 'get_custom_exercise_recommendations'],
+        namespace
+    )
+    return functions, namespace
+
+
+# Function to run the micro-benchmarks for the pure page functions
+def run_micro_benchmarks(repeat=200):
+    results = {}
+
+    (calculate_week_of_pregnancy,) = tracker_functions()
+    dates = itertools.cycle(['2026-03-01', '2026-05-15', '2026-08-30'])
+    types = itertools.cycle(['Conception Date', 'Last Menstrual Period Date'])
+    results['micro.calculate_week_of_pregnancy'] = summarize(
+        time_calls(lambda: calculate_week_of_pregnancy(next(dates), next(types)), repeat)
+    )
+
+    (get_custom_diet_recommendations, filter_meals, get_custom_exercise_recommendations), namespace = diet_functions()
+    restrictions = itertools.cycle([[], ['Vegetarian'], ['Vegan', 'Gluten-Free'], ['Lactose Intolerant']])
+    trimesters = itertools.cycle(['First Trimester', 'Second Trimester', 'Third Trimester'])
+    preferences = itertools.cycle(['2 main meals', '3 main meals', '3 main meals with snacks', 'Flexible'])
+    exercise_types = namespace['exercise_data']['exercise_type'].unique().tolist()
+
+    results['micro.get_custom_diet_recommendations'] = summarize(
+        time_calls(lambda: get_custom_diet_recommendations(next(trimesters), next(restrictions)), repeat)
+    )
+    results['micro.filter_meals'] = summarize(
+        time_calls(lambda: filter_meals(namespace['diet_chart_data'], next(trimesters), next(restrictions), next(preferences)), repeat)
+    )
+    results['micro.get_custom_exercise_recommendations'] = summarize(
+        time_calls(lambda: get_custom_exercise_recommendations(next(trimesters), exercise_types[:2]), repeat)
+    )
+
+    # The tracker page's per-request chart path: copy the precomputed figure and serialize it as st.plotly_chart does
+    week_charts = build_week_charts()
+    weeks = itertools.cycle(range(1, 42))
+    results['micro.doughnut_chart_for_week'] = summarize(
+        time_calls(lambda: plotly.io.to_json(plotly.tools.return_figure_from_figure_or_data(doughnut_chart_for_week(week_charts, next(weeks)), True), validate=False), repeat)
+    )
+    return results
@@ -0,0 +1,52 @@
+import argparse
+import sys
+
+from bench_utils import compare_results, write_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the micro, link parsing, scenario and API benchmarks and write the results as JSON.')
+    parser.add_argument('--output', default='bench_results.json', help='JSON file to write the results to')
+    parser.add_argument('--only', choices=['micro', 'parsing', 'scenarios', 'api'], help='run only one part of the suite')
+    parser.add_argument('--repeat', type=int, default=200, help='calls per micro-benchmark')
+    parser.add_argument('--sessions', type=int, default=20, help='simulated sessions per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='sessions run at the same time')
+    parser.add_argument('--connections', type=int, default=32, help='keep-alive connections for the API load test')
+    parser.add_argument('--api-workers', type=int, default=1, help='API server processes for the API load test')
+    parser.add_argument('--baseline', help='earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown of the median against the baseline')
+    args = parser.parse_args(argv)
+
+    results = {}
+    if args.only in (None, 'micro'):
+        from micro import run_micro_benchmarks
+        results.update(run_micro_benchmarks(args.repeat))
+    if args.only in (None, 'parsing'):
+        from link_parsing import run_link_parsing_benchmarks
+        results.update(run_link_parsing_benchmarks(args.repeat))
+    if args.only in (None, 'scenarios'):
+        from scenarios import run_scenario_benchmarks
+        results.update(run_scenario_benchmarks(args.sessions, args.concurrency))
+    if args.only in (None, 'api'):
+        from api_load import run_api_benchmarks
+        results.update(run_api_benchmarks(args.connections, args.repeat, args.api_workers))
+
+    for name, summary in results.items():
+        memory = f", peak {summary['peak_kib']:.1f} KiB" if 'peak_kib' in summary else ''
+        throughput = f", {summary['requests_per_second']:.0f} req/s" if 'requests_per_second' in summary else ''
+        print(f"{name}: median {summary['median_ms']:.3f} ms, p95 {summary['p95_ms']:.3f} ms{memory}{throughput}")
+        if summary.get('vs_first_turn', 0) > 2:
+            print(f"WARNING {name}: the last turn is {summary['vs_first_turn']:.1f}x slower than the first")
+    write_results(results, args.output)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare_results(results, args.baseline, args.tolerance)
+        for name, before, after, change in regressions:
+            print(f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms (+{change:.0%})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
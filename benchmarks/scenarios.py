@@ -0,0 +1,207 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench_utils import PAGES, ROOT, summarize
+
+# Search result page served by the local stub search server
+SEARCH_FIXTURE = '<html><body>' + ''.join(
+    f'<div class="g"><div class="tF2Cxc"><a href="https://example.org/pregnancy/{n}">Result {n}</a></div></div>'
+    for n in range(1, 9)
+) + '</body></html>'
+
+# Video items returned by the stubbed YouTube search
+VIDEO_FIXTURE = [{'id': {'videoId': video_id}, 'snippet': {'title': video_id}} for video_id in ('H7H6PDvYeBE', 'CDuBFiLQ0zw', 'jWxvty2KROs')]
+
+
+class StubSearchHandler(BaseHTTPRequestHandler):
+    latency = 0.05
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        body = SEARCH_FIXTURE.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Limits the stubs run under: high enough that the token buckets never throttle a scenario,
+# so the assistant numbers measure the page rather than the production rate limits
+STUB_RATE_LIMITS = dict(rate=1000.0, burst=1000)
+
+
+# Function to point the assistant page's upstream calls at local stubs.
+# Returns a callable that stops the stub search server.
+def install_stubs(llm_latency=0.05, search_latency=0.05, youtube_latency=0.05):
+    os.environ['LLM_PROVIDER'] = 'stub'
+    os.environ['STUB_LLM_LATENCY'] = str(llm_latency)
+    os.environ['STUB_LLM_TOKEN_LATENCY'] = '0'
+    state_dir = tempfile.mkdtemp(prefix='bench-')
+    os.environ['ANSWER_CACHE_PATH'] = os.path.join(state_dir, 'answer_cache.db')
+    os.environ['COHORT_DB_PATH'] = os.path.join(state_dir, 'cohort.db')
+    os.environ['APPOINTMENTS_DB_PATH'] = os.path.join(state_dir, 'appointments.db')
+    os.environ['YOUTUBE_QUOTA_PATH'] = os.path.join(state_dir, 'youtube_quota.db')
+
+    StubSearchHandler.latency = search_latency
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubSearchHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['SEARCH_URL'] = f'http://127.0.0.1:{server.server_address[1]}/search'
+
+    import youtube_client
+
+    def stub_search(self, query, entry):
+        time.sleep(youtube_latency)
+        return VIDEO_FIXTURE
+
+    youtube_client.YouTubeSearch._search = stub_search
+
+    import rate_limit
+
+    for limits in rate_limit.PROVIDER_LIMITS.values():
+        limits.update(STUB_RATE_LIMITS)
+    rate_limit._limiters.clear()
+    return server.shutdown
+
+# Function to empty the answer cache, so no scenario is served answers cached by an earlier one
+def clear_answer_cache():
+    with sqlite3.connect(os.environ['ANSWER_CACHE_PATH']) as conn:
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'answers'").fetchone():
+            conn.execute('DELETE FROM answers')
+
+
+# Function to let AppTest sessions run concurrently in one process.
+# Each AppTest.run() installs its mock runtime as the global Runtime instance and clears it when
+# it finishes, which would pull the runtime out from under the sessions still running; instead,
+# fall back to the last mock runtime that was installed. Each session also compiles the page
+# itself, and ast.parse is not thread-safe on Python 3.11, so compiles take turns.
+# These patches replace private Streamlit internals (Runtime.instance, Runtime.exists,
+# ScriptCache.get_bytecode) and were checked against Streamlit 1.65.0; recheck them on upgrade.
+def allow_concurrent_app_tests():
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    last_runtime = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            last_runtime[:] = [cls._instance]
+            return cls._instance
+        if last_runtime:
+            return last_runtime[0]
+        raise RuntimeError("Runtime hasn't been created!")
+
+    def exists(cls):
+        return cls._instance is not None or bool(last_runtime)
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def locked_get_bytecode(self, script_path):
+        with compile_lock:
+            return get_bytecode(self, script_path)
+
+    ScriptCache.get_bytecode = locked_get_bytecode
+
+
+# Functions driving one simulated session of each page; each returns the rerun durations in ms
+def timed_run(app_test):
+    start = time.perf_counter()
+    app_test.run()
+    if app_test.exception:
+        raise RuntimeError(app_test.exception[0].message)
+    return (time.perf_counter() - start) * 1000
+
+def tracker_session(session):
+    from streamlit.testing.v1 import AppTest
+
+    app_test = AppTest.from_file(PAGES['tracker'], default_timeout=60)
+    durations = [timed_run(app_test)]
+    app_test.selectbox[0].set_value(('Conception Date', 'Last Menstrual Period Date')[session % 2])
+    app_test.date_input[0].set_value(date.today() - timedelta(weeks=4 + session % 30))
+    app_test.button[0].click()
+    durations.append(timed_run(app_test))
+    return durations
+
+def diet_session(session):
+    from streamlit.testing.v1 import AppTest
+
+    app_test = AppTest.from_file(PAGES['diet'], default_timeout=60)
+    durations = [timed_run(app_test)]
+    app_test.radio[0].set_value(('First Trimester', 'Second Trimester', 'Third Trimester')[session % 3])
+    app_test.multiselect[0].set_value([['None'], ['Vegetarian'], ['Vegan', 'Gluten-Free'], ['Lactose Intolerant']][session % 4])
+    app_test.radio[1].set_value(('2 main meals', '3 main meals', '3 main meals with snacks', 'Flexible')[session % 4])
+    app_test.multiselect[1].set_value(app_test.multiselect[1].options[:2])
+    app_test.button[0].click()
+    durations.append(timed_run(app_test))
+    return durations
+
+# Follow-up questions asked after the first one in a conversation scenario
+FOLLOW_UPS = [
+    'How much is too much?',
+    'What about tea?',
+    'Which drinks help with nausea?',
+    'Is that different in the third trimester?',
+]
+
+def assistant_session(session, unique_queries=True, turns=1):
+    from streamlit.testing.v1 import AppTest
+
+    app_test = AppTest.from_file(PAGES['assistant'], default_timeout=60)
+    durations = [timed_run(app_test)]
+    query = 'Is it safe to drink coffee while pregnant?'
+    app_test.chat_input[0].set_value(f'{query} (session {session})' if unique_queries else query)
+    durations.append(timed_run(app_test))
+    for turn in range(1, turns):
+        app_test.chat_input[0].set_value(f'{FOLLOW_UPS[(turn - 1) % len(FOLLOW_UPS)]} (turn {turn})')
+        durations.append(timed_run(app_test))
+    return durations
+
+
+SCENARIOS = {
+    'tracker': tracker_session,
+    'diet': diet_session,
+    'assistant_unique': lambda session: assistant_session(session, unique_queries=True),
+    'assistant_repeated': lambda session: assistant_session(session, unique_queries=False),
+    'assistant_conversation': lambda session: assistant_session(session, turns=12),
+}
+
+
+# Function to run every scenario with `sessions` concurrent simulated sessions
+def run_scenario_benchmarks(sessions=20, concurrency=8):
+    os.chdir(ROOT)
+    stop_stubs = install_stubs()
+    allow_concurrent_app_tests()
+    results = {}
+    try:
+        for name, scenario in SCENARIOS.items():
+            clear_answer_cache()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                runs = list(executor.map(scenario, range(sessions)))
+            wall_ms = (time.perf_counter() - start) * 1000
+
+            results[f'scenario.{name}.first_load'] = summarize([durations[0] for durations in runs])
+            summary = summarize([durations[1] for durations in runs])
+            summary['sessions_per_second'] = round(sessions / (wall_ms / 1000), 2)
+            results[f'scenario.{name}.submit'] = summary
+            if len(runs[0]) > 2:
+                # Multi-turn sessions: the last turn should take no longer than the first
+                last_turn = summarize([durations[-1] for durations in runs])
+                last_turn['vs_first_turn'] = round(last_turn['median_ms'] / summary['median_ms'], 2)
+                results[f'scenario.{name}.last_turn'] = last_turn
+    finally:
+        stop_stubs()
+    return results
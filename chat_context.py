@@ -0,0 +1,80 @@
+import re
+from collections import deque
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+# Function to estimate the token count of a text (about four characters per token for English)
+def count_tokens(text):
+    return (len(text) + 3) // 4
+
+# Function to shorten a text to about max_tokens, cutting at a word boundary
+def truncate_tokens(text, max_tokens):
+    limit = max_tokens * 4
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(' ', 1)[0] + '...'
+
+# Function to fold a turn into one summary line: the question and the first sentence of the answer
+def summarize_turn(question, answer, max_tokens=60):
+    first_sentence = SENTENCE_END.split(answer.replace('**', '').strip(), 1)[0]
+    return truncate_tokens(f"Asked: {question.strip()} Answered: {first_sentence}", max_tokens)
+
+
+# Conversation memory for the LLM prompt, bounded by a token budget.
+# The latest turns are kept verbatim; older ones are folded into a running summary whose
+# oldest lines are dropped once it outgrows summary_tokens, so the stored history stays
+# within max_tokens however long the conversation runs.
+class ChatContext:
+    def __init__(self, max_tokens=1200, recent_turns=3, summary_tokens=300, max_turn_tokens=400, summarize=summarize_turn):
+        self.max_tokens = max_tokens
+        self.recent_turns = recent_turns
+        self.summary_tokens = summary_tokens
+        self.max_turn_tokens = max_turn_tokens
+        self.summarize = summarize
+        self.recent = deque()
+        self.summary = deque()
+        self.turns = 0
+
+    def add_turn(self, question, answer):
+        question = truncate_tokens(question.strip(), self.max_turn_tokens // 4)
+        answer = truncate_tokens(answer.strip(), self.max_turn_tokens - count_tokens(question))
+        self.recent.append((question, answer, count_tokens(question) + count_tokens(answer)))
+        self.turns += 1
+
+        recent_budget = self.max_tokens - self.summary_tokens
+        while len(self.recent) > self.recent_turns or (len(self.recent) > 1 and self.recent_token_count() > recent_budget):
+            old_question, old_answer, _ = self.recent.popleft()
+            line = self.summarize(old_question, old_answer)
+            self.summary.append((line, count_tokens(line)))
+        while self.summary and self.summary_token_count() > self.summary_tokens:
+            self.summary.popleft()
+
+    def recent_token_count(self):
+        return sum(tokens for _, _, tokens in self.recent)
+
+    def summary_token_count(self):
+        return sum(tokens for _, tokens in self.summary)
+
+    def token_count(self):
+        return self.recent_token_count() + self.summary_token_count()
+
+    def is_empty(self):
+        return not self.recent and not self.summary
+
+    def last_question(self):
+        return self.recent[-1][0] if self.recent else ''
+
+    def clear(self):
+        self.recent.clear()
+        self.summary.clear()
+        self.turns = 0
+
+    # Function to render the conversation so far for the prompt
+    def render(self):
+        sections = []
+        if self.summary:
+            sections.append("Summary of the earlier conversation:\n" + '\n'.join(f"- {line}" for line, _ in self.summary))
+        if self.recent:
+            sections.append("Recent conversation:\n" + '\n'.join(f"User: {question}\nAssistant: {answer}" for question, answer, _ in self.recent))
+        return '\n\n'.join(sections)
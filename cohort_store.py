@@ -0,0 +1,131 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from pregnancy_dates import CALCULATION_TYPES, START_OFFSET_DAYS, due_dates, to_days, weeks_of_pregnancy
+
+# First week of each trimester
+TRIMESTER_START_WEEKS = {1: 1, 2: 14, 3: 28}
+# Columns expected in an uploaded patients CSV
+PATIENT_COLUMNS = ['patient_id', 'name', 'date', 'calculation_type']
+
+
+# SQLite store of patients with indexed due dates and week-one start dates.
+# A patient is in week w on day d when d - 7w < week_one_start <= d - 7(w - 1),
+# so "which patients are in week w" is a range scan on the week_one_start index.
+class CohortStore:
+    def __init__(self, path='cohort.db'):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            '''
+            CREATE TABLE IF NOT EXISTS patients (
+                patient_id TEXT PRIMARY KEY,
+                name TEXT,
+                start_date TEXT NOT NULL,
+                calculation_type TEXT NOT NULL,
+                due_date TEXT NOT NULL,
+                week_one_start TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS patients_due_date ON patients (due_date);
+            CREATE INDEX IF NOT EXISTS patients_week_one_start ON patients (week_one_start);
+            '''
+        )
+        self._conn.commit()
+
+    # Function to insert or update many patients at once
+    def upsert_patients(self, patient_ids, names, start_dates, calculation_types):
+        start_days = to_days(start_dates)
+        types = [CALCULATION_TYPES[value] for value in np.broadcast_to(np.asarray(calculation_types, dtype=object), start_days.shape)]
+        due = due_dates(start_days, types)
+        offsets = np.array([START_OFFSET_DAYS[value] for value in types], dtype='timedelta64[D]')
+        week_one_start = start_days - offsets
+
+        rows = zip(
+            [str(patient_id) for patient_id in patient_ids],
+            names,
+            start_days.astype(str),
+            types,
+            due.astype(str),
+            week_one_start.astype(str)
+        )
+        with self._lock:
+            self._conn.executemany(
+                '''
+                INSERT INTO patients (patient_id, name, start_date, calculation_type, due_date, week_one_start)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (patient_id) DO UPDATE SET
+                    name = excluded.name,
+                    start_date = excluded.start_date,
+                    calculation_type = excluded.calculation_type,
+                    due_date = excluded.due_date,
+                    week_one_start = excluded.week_one_start
+                ''',
+                rows
+            )
+            self._conn.commit()
+
+    # Function to insert or update the patients in a DataFrame with the PATIENT_COLUMNS.
+    # Rows with a missing id or an unreadable date or calculation type are skipped, as in
+    # pregnancy_dates.process_chunk; returns the number of rows loaded and skipped.
+    def upsert_frame(self, patients):
+        missing = [column for column in PATIENT_COLUMNS if column not in patients.columns]
+        if missing:
+            raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+        dates = pd.to_datetime(patients['date'], errors='coerce').to_numpy(dtype='datetime64[D]')
+        types = patients['calculation_type'].map(CALCULATION_TYPES)
+        valid = ~np.isnat(dates) & types.notna().to_numpy() & patients['patient_id'].notna().to_numpy()
+        loaded = patients[valid]
+        names = loaded['name'].astype(object).where(loaded['name'].notna(), None)
+        if len(loaded):
+            self.upsert_patients(loaded['patient_id'], names, dates[valid], types[valid])
+        return len(loaded), len(patients) - len(loaded)
+
+    def delete_patient(self, patient_id):
+        with self._lock:
+            self._conn.execute('DELETE FROM patients WHERE patient_id = ?', (str(patient_id),))
+            self._conn.commit()
+
+    def _query(self, where, params, as_of, order_by):
+        with self._lock:
+            patients = pd.read_sql_query(
+                f'SELECT patient_id, name, start_date, calculation_type, due_date FROM patients WHERE {where} ORDER BY {order_by}',
+                self._conn,
+                params=params
+            )
+        # Derive the current week with the same arithmetic as the tracker page
+        patients['week'] = weeks_of_pregnancy(patients['start_date'].to_numpy(dtype='datetime64[D]'), patients['calculation_type'].to_numpy(dtype=object), as_of)
+        return patients
+
+    @staticmethod
+    def _as_of(as_of):
+        return np.datetime64('today', 'D') if as_of is None else np.datetime64(as_of, 'D')
+
+    # Function to list patients in a range of weeks as of a given day (default today)
+    def patients_in_weeks(self, first_week, last_week=None, as_of=None):
+        as_of = self._as_of(as_of)
+        last_week = first_week if last_week is None else last_week
+        earliest = as_of - np.timedelta64(7 * last_week - 1, 'D')
+        latest = as_of - np.timedelta64(7 * (first_week - 1), 'D')
+        return self._query('week_one_start BETWEEN ? AND ?', (str(earliest), str(latest)), as_of, 'week_one_start DESC')
+
+    # Function to list patients due within the next `days` days
+    def upcoming_due_dates(self, days=30, as_of=None):
+        as_of = self._as_of(as_of)
+        return self._query('due_date BETWEEN ? AND ?', (str(as_of), str(as_of + np.timedelta64(days, 'D'))), as_of, 'due_date')
+
+    # Function to list patients entering a trimester within the next `days` days
+    def entering_trimester(self, trimester, days=7, as_of=None):
+        as_of = self._as_of(as_of)
+        # Trimester starts on week_one_start + 7 * (start_week - 1)
+        shift = np.timedelta64(7 * (TRIMESTER_START_WEEKS[trimester] - 1), 'D')
+        earliest = as_of - shift
+        latest = as_of + np.timedelta64(days, 'D') - shift
+        return self._query('week_one_start BETWEEN ? AND ?', (str(earliest), str(latest)), as_of, 'week_one_start')
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM patients').fetchone()[0]
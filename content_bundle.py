@@ -0,0 +1,238 @@
+import argparse
+import csv
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+import re
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_PATH = 'content.bundle'
+
+# Source CSV of each table
+SOURCES = {
+    'weeks': 'weeks.csv',
+    'diet': 'diet_nutrition.csv',
+    'exercises': 'exercise_routines.csv',
+    'diet_chart': 'sample_diet_chart.csv',
+}
+
+# Column types of each table
+SCHEMAS = {
+    'weeks': {'week': int, 'babyDevelopment': str, 'pregnancySymptoms': str, 'pregnancyChecklist': str, 'images': str},
+    'diet': {'trimester': str, 'food_group': str, 'examples': str},
+    'exercises': {'trimester': str, 'exercise': str, 'exercise_type': str, 'description': str, 'video_id': str},
+    'diet_chart': {'trimester': str, 'meal': str, 'food': str},
+}
+
+TRIMESTERS = ('First Trimester', 'Second Trimester', 'Third Trimester')
+MEALS = ('Breakfast', 'Snack', 'Lunch', 'Dinner')
+# Weeks the tracker shows content for
+REQUIRED_WEEKS = range(2, 41)
+VIDEO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg')
+# Quotes or whitespace inside a URL are left over from bad CSV quoting
+URL_JUNK_PATTERN = re.compile(r'[\s"\']')
+
+
+class ContentError(ValueError):
+    pass
+
+
+# Function to read and type one source CSV into a struct of arrays (one list per column)
+def read_table(name, path, problems):
+    schema = SCHEMAS[name]
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.DictReader(file)
+        missing = set(schema) - set(reader.fieldnames or [])
+        if missing:
+            problems.append(f"{path}: missing columns {', '.join(sorted(missing))}")
+            return {column: [] for column in schema}
+
+        columns = {column: [] for column in schema}
+        for line_number, row in enumerate(reader, start=2):
+            for column, column_type in schema.items():
+                value = (row[column] or '').strip()
+                if not value:
+                    problems.append(f"{path}:{line_number}: empty {column}")
+                try:
+                    columns[column].append(column_type(value))
+                except ValueError:
+                    problems.append(f"{path}:{line_number}: {column} is not a valid {column_type.__name__}: {value!r}")
+                    columns[column].append(None)
+    return columns
+
+# Function to check the cross-row rules the pages rely on
+# Function to check that a URL is a plain http(s) link to an image file
+def is_image_url(url):
+    parsed = urlparse(url)
+    return (
+        parsed.scheme in ('http', 'https')
+        and bool(parsed.netloc)
+        and not URL_JUNK_PATTERN.search(url)
+        and parsed.path.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+def validate_tables(tables, problems):
+    weeks = tables['weeks']['week']
+    if len(set(weeks)) != len(weeks):
+        problems.append("weeks.csv: duplicate week numbers")
+    week_numbers = {week for week in weeks if week is not None}
+    missing_weeks = [week for week in REQUIRED_WEEKS if week not in week_numbers]
+    if missing_weeks:
+        problems.append(f"weeks.csv: missing weeks {', '.join(map(str, missing_weeks))}")
+    for week, images in zip(weeks, tables['weeks']['images']):
+        for url in images.split(';'):
+            url = url.strip()
+            if url and not is_image_url(url):
+                problems.append(f"weeks.csv: week {week} has an invalid image URL {url!r}")
+
+    for name in ('diet', 'exercises', 'diet_chart'):
+        trimesters = tables[name]['trimester']
+        unknown = sorted(set(trimesters) - set(TRIMESTERS))
+        if unknown:
+            problems.append(f"{SOURCES[name]}: unknown trimesters {', '.join(unknown)}")
+        if name != 'exercises':
+            absent = [trimester for trimester in TRIMESTERS if trimester not in trimesters]
+            if absent:
+                problems.append(f"{SOURCES[name]}: no rows for {', '.join(absent)}")
+
+    unknown_meals = sorted(set(tables['diet_chart']['meal']) - set(MEALS))
+    if unknown_meals:
+        problems.append(f"sample_diet_chart.csv: unknown meals {', '.join(unknown_meals)}")
+    for exercise, video_id in zip(tables['exercises']['exercise'], tables['exercises']['video_id']):
+        if not VIDEO_ID_PATTERN.match(video_id):
+            problems.append(f"exercise_routines.csv: {exercise} has an invalid video id {video_id!r}")
+
+def source_mtimes(base_dir='.'):
+    return {name: os.stat(os.path.join(base_dir, path)).st_mtime_ns for name, path in SOURCES.items()}
+
+
+# Validated, typed content compiled from the source CSVs
+class ContentBundle:
+    def __init__(self, version, mtimes, tables):
+        self.version = version
+        self.mtimes = mtimes
+        self.tables = tables
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    # Function to get a table as a DataFrame, built once per bundle
+    def frame(self, name):
+        import pandas as pd
+
+        with self._lock:
+            if name not in self._frames:
+                self._frames[name] = pd.DataFrame(self.tables[name])
+            return self._frames[name].copy(deep=False)
+
+
+# Function to compile and validate the source CSVs into a bundle file, replacing it atomically
+def compile_bundle(base_dir='.', bundle_path=BUNDLE_PATH):
+    mtimes = source_mtimes(base_dir)
+    problems = []
+    digest = hashlib.sha256()
+    tables = {}
+    for name, path in SOURCES.items():
+        full_path = os.path.join(base_dir, path)
+        with open(full_path, 'rb') as file:
+            digest.update(file.read())
+        tables[name] = read_table(name, full_path, problems)
+    if not problems:
+        validate_tables(tables, problems)
+    if problems:
+        raise ContentError('Invalid content:\n' + '\n'.join(problems))
+
+    payload = {'version': digest.hexdigest()[:16], 'mtimes': mtimes, 'tables': tables}
+    temporary_path = f'{bundle_path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'wb') as file:
+        pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, bundle_path)
+    return ContentBundle(**payload)
+
+# Function to load a compiled bundle with a single memory-mapped read
+def load_bundle(bundle_path=BUNDLE_PATH):
+    with open(bundle_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return ContentBundle(**pickle.loads(mapped))
+
+
+# Keeps the current bundle, rebuilding and swapping it in when a source CSV changes
+class ContentStore:
+    def __init__(self, base_dir='.', bundle_path=BUNDLE_PATH, check_interval=1.0):
+        self.base_dir = base_dir
+        self.bundle_path = os.path.join(base_dir, bundle_path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._bundle = self._load_or_compile()
+        self._seen_mtimes = self._bundle.mtimes
+        self._last_error = None
+        self._last_check = time.monotonic()
+
+    def _load_or_compile(self):
+        if os.path.exists(self.bundle_path):
+            try:
+                bundle = load_bundle(self.bundle_path)
+                if bundle.mtimes == source_mtimes(self.base_dir):
+                    return bundle
+            except (OSError, pickle.UnpicklingError, EOFError, TypeError, ValueError):
+                logger.warning("Could not read %s, rebuilding it", self.bundle_path)
+        return compile_bundle(self.base_dir, self.bundle_path)
+
+    # Function to return the current bundle, checking the source modification times at most once per interval
+    def current(self):
+        if time.monotonic() - self._last_check < self.check_interval:
+            return self._bundle
+        with self._lock:
+            if time.monotonic() - self._last_check >= self.check_interval:
+                self._last_check = time.monotonic()
+                try:
+                    mtimes = source_mtimes(self.base_dir)
+                    if mtimes != self._seen_mtimes:
+                        self._bundle = compile_bundle(self.base_dir, self.bundle_path)
+                        # Only a successful compile is remembered, so a failed one is retried on the next check
+                        self._seen_mtimes = mtimes
+                        self._last_error = None
+                        logger.info("Reloaded content bundle %s", self._bundle.version)
+                except Exception as e:
+                    # Keep serving the last valid bundle until the files are fixed. This also covers a file
+                    # caught mid-save (missing, or half written), which the next check picks up again.
+                    if repr(e) != self._last_error:
+                        self._last_error = repr(e)
+                        logger.error("Could not reload the content bundle: %s", e)
+        return self._bundle
+
+_store = None
+_store_lock = threading.Lock()
+
+# Function to get the process-wide content store
+def get_content_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ContentStore()
+        return _store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compile the content CSVs into a validated bundle.')
+    parser.add_argument('--base-dir', default='.', help='folder holding the source CSVs')
+    parser.add_argument('--output', default=BUNDLE_PATH, help='bundle file to write')
+    args = parser.parse_args(argv)
+
+    try:
+        bundle = compile_bundle(args.base_dir, os.path.join(args.base_dir, args.output))
+    except ContentError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Compiled content bundle {bundle.version}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Allergen/diet attributes, one bit each
+MEAT = 1
+FISH = 2
+DAIRY = 4
+EGG = 8
+GLUTEN = 16
+
+# Keywords that tag a food item with each attribute (matched on whole words)
+ATTRIBUTE_KEYWORDS = {
+    MEAT: ['meat', 'meats', 'chicken', 'mutton', 'lamb', 'beef', 'pork', 'turkey'],
+    FISH: ['fish', 'salmon', 'tuna', 'sardines', 'prawn', 'prawns', 'shrimp'],
+    DAIRY: ['milk', 'buttermilk', 'milkshake', 'yogurt', 'yoghurt', 'cheese', 'curd', 'raita', 'paneer', 'butter', 'ghee', 'cream'],
+    EGG: ['egg', 'eggs'],
+    GLUTEN: ['wheat', 'barley', 'rye', 'bread', 'toast', 'chapati', 'paratha', 'semolina', 'suji', 'sooji', 'rava',
+             'upma', 'muesli', 'couscous', 'pasta', 'noodles', 'maida', 'dalia', 'seitan'],
+}
+ATTRIBUTE_PATTERNS = {
+    attribute: re.compile(r'\b(?:' + '|'.join(keywords) + r')\b', re.IGNORECASE)
+    for attribute, keywords in ATTRIBUTE_KEYWORDS.items()
+}
+
+# Attributes excluded by each dietary restriction, shared by the diet table and the meal chart
+RESTRICTION_MASKS = {
+    'vegetarian': MEAT | FISH | EGG,
+    'vegan': MEAT | FISH | DAIRY | EGG,
+    'gluten-free': GLUTEN,
+    'lactose intolerant': DAIRY,
+}
+
+# Function to tag a single food item with its attribute bitmask
+def tag_item(item):
+    mask = 0
+    for attribute, pattern in ATTRIBUTE_PATTERNS.items():
+        if pattern.search(item):
+            mask |= attribute
+    return mask
+
+# Function to combine a list of restrictions into one exclusion bitmask
+def restriction_mask(dietary_restrictions):
+    mask = 0
+    for restriction in dietary_restrictions:
+        mask |= RESTRICTION_MASKS.get(restriction.lower(), 0)
+    return mask
+
+
+# Food filter built once at load time: every item of `column` is split out and tagged,
+# so applying any set of restrictions is a single mask operation
+class FoodFilter:
+    def __init__(self, data, column):
+        self.data = data.reset_index(drop=True)
+        self.column = column
+        items = self.data[column].str.split(', ').explode()
+        self.items = pd.DataFrame({'row': items.index, 'item': items.values})
+        self.item_masks = self.items['item'].map(tag_item).to_numpy(dtype=np.int64)
+
+    # Function to return the selected rows with restricted items removed from `column`
+    def apply(self, rows, excluded_mask):
+        result = self.data[rows].copy()
+        if excluded_mask:
+            kept = self.items[(self.item_masks & excluded_mask) == 0]
+            joined = kept.groupby('row', sort=False)['item'].agg(', '.join)
+            result[self.column] = joined.reindex(result.index, fill_value='')
+        return result
@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from rate_limit import PROVIDER_LIMITS, deadline
+
+# Shared worker pool for the outbound calls made by the assistant page. It has a thread for every
+# call the limiters let in or queue, so a submitted call never waits for a free worker; calls
+# beyond that are turned away by the limiters straight away.
+MAX_WORKERS = sum(limits['max_in_flight'] + limits['max_waiting'] for limits in PROVIDER_LIMITS.values())
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='fan-out')
+
+def run_with_deadline(at, func, args):
+    with deadline(at):
+        return func(*args)
+
+# Function to start several named calls on the worker pool.
+# Each call's limiter waits stop at its timeout (see rate_limit.deadline).
+def submit_tasks(tasks, timeouts=None, default_timeout=20):
+    submitted_at = time.monotonic()
+    timeouts = timeouts or {}
+    return {
+        executor.submit(run_with_deadline, submitted_at + timeouts.get(name, default_timeout), func, args): (name, submitted_at)
+        for name, (func, args) in tasks.items()
+    }
+
+# Function to yield each submitted call as it finishes.
+# Yields (name, result, error) tuples; a call that overruns its timeout is yielded
+# with a TimeoutError so it never blocks the others.
+def iter_completed(futures, timeouts, default_timeout=20):
+    deadlines = {
+        future: submitted_at + timeouts.get(name, default_timeout)
+        for future, (name, submitted_at) in futures.items()
+    }
+    pending = set(futures)
+
+    while pending:
+        next_deadline = min(deadlines[future] for future in pending)
+        done, pending = wait(pending, timeout=max(0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            error = future.exception()
+            yield futures[future][0], None if error else future.result(), error
+
+        now = time.monotonic()
+        for future in [future for future in pending if deadlines[future] <= now]:
+            pending.discard(future)
+            future.cancel()
+            yield futures[future][0], None, TimeoutError(f"{futures[future][0]} timed out")
+
+# Function to run several named calls concurrently and yield each one as it finishes
+def run_concurrently(tasks, timeouts, default_timeout=20):
+    return iter_completed(submit_tasks(tasks, timeouts, default_timeout), timeouts, default_timeout)
@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+# Shared HTTP client with keep-alive pooling, timeouts, bounded retries and a small response cache
+class HttpClient:
+    def __init__(self, connect_timeout=3.05, read_timeout=10, retries=2, backoff_factor=0.3,
+                 pool_size=20, cache_size=256, cache_ttl=3600, headers=None, limiter=None, chunk_size=16384):
+        self.limiter = limiter
+        self.chunk_size = chunk_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _cache_get(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.cache_ttl:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry[1]
+
+    def _cache_set(self, key, value):
+        with self._lock:
+            self._cache[key] = (time.monotonic(), value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # Function to stream a page's text through consume(chunks), which may stop reading early.
+    # Only consume's result is cached, under cache_key, as the page itself is never read in full.
+    def get_streamed(self, url, params, consume, cache_key=None):
+        key = ('stream', url, tuple(sorted((params or {}).items())), cache_key)
+        result = self._cache_get(key)
+        if result is not None:
+            return result
+
+        if self.limiter is not None:
+            result = self.limiter.call(key, self._stream, url, params, consume)
+        else:
+            result = self._stream(url, params, consume)
+        self._cache_set(key, result)
+        return result
+
+    def _stream(self, url, params, consume):
+        # Closing the response when consume returns drops the rest of the body unread
+        with self.session.get(url, params=params, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            response.encoding = response.encoding or 'utf-8'
+            return consume(response.iter_content(chunk_size=self.chunk_size, decode_unicode=True))
+
+    def close(self):
+        self.session.close()
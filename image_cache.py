@@ -0,0 +1,141 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+from urllib.parse import urlparse
+
+import pandas as pd
+
+# Served by Streamlit's static file serving (see .streamlit/config.toml)
+STATIC_DIR = 'static'
+THUMBNAIL_DIR = os.path.join(STATIC_DIR, 'thumbnails')
+MANIFEST_PATH = os.path.join(THUMBNAIL_DIR, 'manifest.json')
+STATIC_URL = 'app/static/thumbnails'
+
+# Cards render images as 20rem (320px) squares; the larger size covers high-density screens
+THUMBNAIL_SIZES = (320, 640)
+FORMATS = {'webp': 'WEBP', 'png': 'PNG'}
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+# Function to return the manifest's modification time (None when there is none), so readers can tell when it changes
+def manifest_mtime(path=MANIFEST_PATH):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    # Write to a temporary file first so readers never see a half-written manifest
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(temporary_path, path)
+
+
+# Function to read an image from the local source folder (matched on file name) or fetch it once over HTTP
+def read_source(url, source_dir=None, offline=False, timeout=(3.05, 20)):
+    if source_dir:
+        local_path = os.path.join(source_dir, os.path.basename(urlparse(url).path))
+        if os.path.exists(local_path):
+            with open(local_path, 'rb') as file:
+                return file.read()
+    if offline:
+        return None
+
+    import requests
+
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+# Function to write the resized thumbnails of one image, named by the hash of its content
+def write_thumbnails(data, thumbnail_dir=THUMBNAIL_DIR):
+    from PIL import Image
+
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    files = {}
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert('RGBA')
+        for size in THUMBNAIL_SIZES:
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size), Image.LANCZOS)
+            for extension, image_format in FORMATS.items():
+                file_name = f'{digest}-{size}.{extension}'
+                file_path = os.path.join(thumbnail_dir, file_name)
+                # Content-addressed, so an existing file is already up to date
+                if not os.path.exists(file_path):
+                    thumbnail.save(file_path + '.tmp', image_format, optimize=True)
+                    os.replace(file_path + '.tmp', file_path)
+                files[f'{size}.{extension}'] = file_name
+    return {'hash': digest, 'files': files}
+
+# Function to make sure every URL has thumbnails, fetching or ingesting only the new ones
+def ingest_images(urls, source_dir=None, offline=False, thumbnail_dir=THUMBNAIL_DIR, manifest_path=MANIFEST_PATH):
+    os.makedirs(thumbnail_dir, exist_ok=True)
+    manifest = load_manifest(manifest_path)
+    missing = []
+    for url in dict.fromkeys(urls):
+        entry = manifest.get(url)
+        if entry and all(os.path.exists(os.path.join(thumbnail_dir, name)) for name in entry['files'].values()):
+            continue
+        # One unreadable or corrupt image is reported and skipped rather than stopping the run
+        try:
+            data = read_source(url, source_dir, offline)
+            entry = write_thumbnails(data, thumbnail_dir) if data is not None else None
+        except Exception as e:
+            print(f"Could not ingest {url}: {e}", file=sys.stderr)
+            entry = None
+        if entry is None:
+            missing.append(url)
+            continue
+        manifest[url] = entry
+        # Saved after every image, so an interrupted run keeps the thumbnails it already made
+        save_manifest(manifest, manifest_path)
+    save_manifest(manifest, manifest_path)
+    return manifest, missing
+
+# Function to collect the image URLs listed in weeks.csv
+def week_image_urls(path='weeks.csv'):
+    urls = []
+    for images in pd.read_csv(path)['images']:
+        urls.extend(url.strip() for url in str(images).split(';') if url.strip())
+    return urls
+
+
+# Function to render an image from the thumbnail cache, falling back to the original URL
+def render_image(url, manifest, css_class='card-img'):
+    entry = manifest.get(url)
+    if entry is None:
+        return f"<img src='{url}' class='{css_class}' loading='lazy'>"
+    files = entry['files']
+    small, large = THUMBNAIL_SIZES
+    return (
+        "<picture>"
+        f"<source type='image/webp' srcset='{STATIC_URL}/{files[f'{small}.webp']} 1x, {STATIC_URL}/{files[f'{large}.webp']} 2x'>"
+        f"<img src='{STATIC_URL}/{files[f'{small}.png']}' srcset='{STATIC_URL}/{files[f'{large}.png']} 2x' class='{css_class}' loading='lazy'>"
+        "</picture>"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the local thumbnail cache for the images in weeks.csv.')
+    parser.add_argument('--weeks', default='weeks.csv', help='weeks CSV listing the image URLs')
+    parser.add_argument('--source-dir', help='folder of already downloaded images, matched by file name')
+    parser.add_argument('--offline', action='store_true', help='never fetch over the network; only use --source-dir')
+    args = parser.parse_args(argv)
+
+    manifest, missing = ingest_images(week_image_urls(args.weeks), args.source_dir, args.offline)
+    print(f"{len(manifest)} images cached in {THUMBNAIL_DIR}, {len(missing)} missing")
+    return 1 if missing else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
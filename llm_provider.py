@@ -0,0 +1,122 @@
+import asyncio
+import functools
+import hashlib
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Sentences the stub backend draws its answers from
+STUB_SENTENCES = [
+    "Every pregnancy is different, so check with your healthcare provider about your own situation.",
+    "Eating a balanced diet with plenty of fruits, vegetables, whole grains and protein supports your baby's growth.",
+    "Prenatal vitamins with folic acid, iron and calcium are usually recommended throughout pregnancy.",
+    "Gentle exercise such as walking, swimming and prenatal yoga is safe for most pregnancies.",
+    "Nausea, tiredness and tender breasts are common in the first trimester.",
+    "Stay well hydrated and rest when your body asks for it.",
+    "Call your doctor straight away if you notice bleeding, severe pain or reduced movement.",
+    "Regular prenatal checkups help track your health and your baby's development.",
+]
+
+
+# Function to load the .env file once per process
+@functools.lru_cache(maxsize=1)
+def load_environment():
+    load_dotenv()
+
+
+# Gemini backend; the client is created on first use and reused for every call
+class GeminiProvider:
+    name = 'gemini'
+
+    def __init__(self, model='gemini-pro', api_key=None, timeout=30):
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from langchain_google_genai import ChatGoogleGenerativeAI
+                    self._client = ChatGoogleGenerativeAI(model=self.model, google_api_key=self.api_key, timeout=self.timeout)
+        return self._client
+
+    def invoke(self, prompt):
+        return self._get_client().invoke(prompt).content
+
+    def stream(self, prompt):
+        for chunk in self._get_client().stream(prompt):
+            if chunk.content:
+                yield chunk.content
+
+    async def ainvoke(self, prompt):
+        return (await self._get_client().ainvoke(prompt)).content
+
+
+# Deterministic offline backend with configurable latency, for load tests and benchmarks.
+# The same prompt always produces the same answer.
+class StubProvider:
+    name = 'stub'
+
+    def __init__(self, first_token_latency=0.3, token_latency=0.01, sentences=3):
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.sentences = sentences
+
+    def answer(self, prompt):
+        seed = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest(), 16)
+        picked = [STUB_SENTENCES[(seed + i) % len(STUB_SENTENCES)] for i in range(self.sentences)]
+        return ' '.join(picked)
+
+    def _tokens(self, prompt):
+        words = self.answer(prompt).split(' ')
+        return [word + ' ' for word in words[:-1]] + words[-1:]
+
+    def invoke(self, prompt):
+        tokens = self._tokens(prompt)
+        time.sleep(self.first_token_latency + self.token_latency * (len(tokens) - 1))
+        return ''.join(tokens)
+
+    def stream(self, prompt):
+        time.sleep(self.first_token_latency)
+        for index, token in enumerate(self._tokens(prompt)):
+            if index:
+                time.sleep(self.token_latency)
+            yield token
+
+    async def ainvoke(self, prompt):
+        tokens = self._tokens(prompt)
+        await asyncio.sleep(self.first_token_latency + self.token_latency * (len(tokens) - 1))
+        return ''.join(tokens)
+
+
+# Function to create the provider selected by the environment.
+# LLM_PROVIDER picks the backend ('gemini' or 'stub'); STUB_LLM_LATENCY and
+# STUB_LLM_TOKEN_LATENCY set the stub's first-token and per-token delays in seconds.
+def create_provider():
+    load_environment()
+    backend = os.getenv('LLM_PROVIDER', 'gemini').lower()
+    if backend == 'stub':
+        return StubProvider(
+            first_token_latency=float(os.getenv('STUB_LLM_LATENCY', '0.3')),
+            token_latency=float(os.getenv('STUB_LLM_TOKEN_LATENCY', '0.01'))
+        )
+    if backend == 'gemini':
+        return GeminiProvider(api_key=os.getenv('GOOGLE_API_KEY'))
+    raise ValueError(f'Unknown LLM provider "{backend}". Please specify either "gemini" or "stub".')
+
+_provider = None
+_provider_lock = threading.Lock()
+
+# Function to get the process-wide provider, created on first use
+def get_provider():
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = create_provider()
+    return _provider
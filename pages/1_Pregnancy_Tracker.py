@@ -1,245 +1,221 @@
+import os
+import uuid
 import streamlit as st
-from datetime import datetime, timedelta
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
+from datetime import datetime, time, timedelta
 import pandas as pd
-import plotly.graph_objects as go
+from week_content import CARD_STYLE, build_week_store
+from content_bundle import get_content_store
+from image_cache import load_manifest, manifest_mtime
+from pregnancy_dates import CONCEPTION, LMP, as_datetime, due_dates, weeks_of_pregnancy
+from cohort_store import CohortStore
+from tracker_charts import build_week_charts, doughnut_chart_for_week
+from appointments import Appointment, AppointmentStore, generate_schedule, iter_ical
+from tracing import span, start_rerun
+
+# The patient cohort view lists every stored patient, so it is off unless the deployment is clinic-only
+show_cohort_view = os.getenv('CLINIC_COHORT_VIEW', '0') == '1'
 
 st.set_page_config(layout="wide")
-# Set the title of the app
-st.title("Pregnancy Tracker")
-
-# Functions for due date calculations
-def get_date_by_conception(date):
-    given_date = datetime.strptime(date, '%Y-%m-%d')
-    future_date = given_date + timedelta(weeks=38)
-    return future_date
-
-def get_date_by_lmp(date):
-    given_date = datetime.strptime(date, '%Y-%m-%d')
-    future_date = given_date + timedelta(weeks=40)
-    return future_date
-
-# Function to calculate current week of pregnancy
-def calculate_week_of_pregnancy(start_date, calculation_type):
-    start_date_obj = datetime.strptime(start_date, '%Y-%m-%d')
-    current_date = datetime.today()
-    
-    if calculation_type == 'Conception Date':
-        time_difference = current_date - start_date_obj
-    elif calculation_type == 'Last Menstrual Period Date':
-        lmp_date = start_date_obj - timedelta(days=14)
-        time_difference = current_date - lmp_date
-    else:
-        raise ValueError('Invalid calculation type. Please specify either "conception" or "lmp".')
-    
-    # Convert the time difference from milliseconds to weeks
-    weeks_elapsed = time_difference.days // 7
-    
-    # Add 1 to the weeks elapsed, as pregnancy is counted from the start of the LMP or conception
-    return weeks_elapsed + 1
-
-# Function to display doughnut chart 
-@st.cache_resource()
-def plot_doughnut_chart(percentage_completed):
-    fig = go.Figure(go.Pie(
-        values=[percentage_completed, 100 - percentage_completed],
-        labels=['Completed', 'Remaining'],
-        hole=.7,
-        marker=dict(colors=['#1db954', '#dddddd']),
-        textinfo='none',  # Hide all text in the slices
-        sort=False,  # Disable sorting to maintain order
-        direction='clockwise'  # Set the direction to clockwise
-    ))
-
-    fig.update_layout(
-        title_text='Pregnancy Progress',
-        title_font=dict(size=24),  # Increase font size of the title
-        annotations=[dict(text=f'{percentage_completed:.1f}% Completed', x=0.5, y=0.5, font_size=20, showarrow=False)],
-        showlegend=False,
-        margin=dict(l=0, r=0, t=40, b=0), # Reduce margins to minimize space
-        height=300
-    )
-    
-    return fig
-
-# Function to display vertical progress bar using HTML and CSS
-def display_vertical_progress_bar(percentage_completed):
-    progress_style = f"""
-    <style>
-    .progress-container {{
-        width: 40px;
-        height: 260px;
-        background-color: #ddd;
-        border-radius: 5px;
-        margin: 0 auto;
-        display: flex;
-        flex-direction: column;
-        justify-content: flex-start;
-        position: relative;
-        top: 40px;
-    }}
-    .progress-bar {{
-        width: 100%;
-        height: {percentage_completed}%;
-        background-color: #1db954;
-        border-radius: 5px 5px 0 0;
-    }}
-    .progress-marker {{
-        width: 100%;
-        height: 5px;
-        background-color: black;
-        position: absolute;
-        left: 0;
-    }}
-    .marker1 {{
-        top: 33.3%;
-    }}
-    .marker2 {{
-        top: 66.6%;
-    }}
-    .marker3 {{
-        top: 99%;
-    }}
-    .label {{
-        position: absolute;
-        width: 200px;
-        left: 74px;
-        font-size: 20px;
-        font-weight: 500;
-        transform: translateY(-50%);
-    }}
-    .label1 {{
-        top: 16.65%;
-    }}
-    .label2 {{
-        top: 50%;
-    }}
-    .label3 {{
-        top: 82.95%;
-    }}
-    </style>
-    """
-    progress_html = f"""
-    <div class="progress-container">
-        <div class="progress-bar"></div>
-        <div class="progress-marker marker1"></div>
-        <div class="progress-marker marker2"></div>
-        <div class="progress-marker marker3"></div>
-        <div class="label label1">First Trimester</div>
-        <div class="label label2">Second Trimester</div>
-        <div class="label label3">Third Trimester</div>
-    </div>
-    """
-    return progress_style + progress_html
-
-# Create two columns
-col1, col2 = st.columns([2, 1.5])
-
-with col1:
-    # Create a form for user input
-    with st.form(key='dateCalculationForm'):
-        calculation_type = st.selectbox(
-            'Calculation Type:',
-            ('Conception Date', 'Last Menstrual Period Date')
+# Everything below is traced as one rerun, including reruns cut short by st.rerun(), st.stop() or an error
+with start_rerun('tracker'):
+    # Set the title of the app
+    st.title("Pregnancy Tracker")
+
+    # Functions for due date calculations
+    def get_date_by_conception(date):
+        return as_datetime(due_dates([date], CONCEPTION)[0])
+
+    def get_date_by_lmp(date):
+        return as_datetime(due_dates([date], LMP)[0])
+
+    # Function to calculate current week of pregnancy
+    def calculate_week_of_pregnancy(start_date, calculation_type):
+        return int(weeks_of_pregnancy([start_date], calculation_type)[0])
+
+    # The compiled content is swapped in when a source CSV changes (see content_bundle.py)
+    content = get_content_store().current()
+
+    # Index the week content once per content and manifest version, keyed by week number
+    @st.cache_resource(max_entries=1)
+    def get_week_store(version, image_manifest_mtime, _content):
+        with span('tracker.build_week_store'):
+            # Images listed in the thumbnail manifest are served locally (see image_cache.py)
+            return build_week_store(_content.frame('weeks'), load_manifest())
+
+    week_store = get_week_store(content.version, manifest_mtime(), content)
+
+    # Precompute the charts for every week once per process
+    @st.cache_resource()
+    def get_week_charts():
+        with span('tracker.build_week_charts'):
+            return build_week_charts()
+
+    week_charts = get_week_charts()
+
+    # Open the appointment store once per process
+    @st.cache_resource()
+    def get_appointment_store():
+        return AppointmentStore(os.getenv('APPOINTMENTS_DB_PATH', 'appointments.db'))
+
+    appointment_store = get_appointment_store()
+    # Each browser's calendar is identified by a random id kept in the page URL, so a reload finds it again
+    calendar_id = st.query_params.get('calendar')
+
+    # Create two columns
+    col1, col2 = st.columns([2, 1.5])
+
+    with col1:
+        # Create a form for user input
+        with st.form(key='dateCalculationForm'):
+            calculation_type = st.selectbox(
+                'Calculation Type:',
+                ('Conception Date', 'Last Menstrual Period Date')
+            )
+            actual_date = st.date_input("Actual Date:")
+
+            # Submit button
+            submit_button = st.form_submit_button(label='Submit')
+
+    # Process form submission
+    if submit_button:
+        if calculation_type == 'Conception Date':
+            due_date = get_date_by_conception(actual_date.strftime('%Y-%m-%d'))
+        else:
+            due_date = get_date_by_lmp(actual_date.strftime('%Y-%m-%d'))
+
+        st.write(f"Expected Due Date: {due_date.strftime('%Y-%m-%d')}")
+
+        # Generate the standard visit schedule when the due date changes
+        if calendar_id is None:
+            calendar_id = st.query_params['calendar'] = uuid.uuid4().hex
+        if appointment_store.load(calendar_id)[0] != due_date.date():
+            appointment_store.replace(calendar_id, due_date.date(), generate_schedule(due_date))
+
+        # Display the selected calculation type and date
+        st.write(f"Calculation Type: {calculation_type}")
+        st.write(f"{calculation_type}: {actual_date}")
+
+        # Calculate the current week of pregnancy
+        with span('tracker.week_calculation'):
+            week_number = calculate_week_of_pregnancy(str(actual_date), calculation_type)
+
+        if 1 <= week_number <= 41 :
+            # Display the week number
+            st.write(f"You are in week {week_number}.")
+
+            # Display doughnut chart
+            col1, col2 = st.columns([2, 2])
+            with col1:
+                with span('tracker.render_chart'):
+                    fig = doughnut_chart_for_week(week_charts, week_number)
+                    st.plotly_chart(fig, use_container_width=True)
+
+            with col2:
+                progress_bar = week_charts[week_number][1]
+                st.markdown(progress_bar, unsafe_allow_html=True)
+
+            st.caption("These charts show the progress of your pregnancy based on the current week. The doughnut chart indicates the overall percentage completed in your 40-week pregnancy journey, while the vertical progress bar highlights your progress through each trimester.")
+        else:
+            st.warning("The calculated week number is out of the valid range (1-40). Please check the input date.")
+        # Look up the preloaded content for the current week
+        week_data = week_store.get(week_number)
+
+        if week_data is not None:
+            # Display HTML with styled content
+            st.markdown(CARD_STYLE, unsafe_allow_html=True)
+
+            # Display the cards with data
+            st.markdown("<h2>Baby Development</h2>", unsafe_allow_html=True)
+            st.markdown(week_data['development_html'], unsafe_allow_html=True)
+
+            st.markdown("<h2>Pregnancy Symptoms</h2>", unsafe_allow_html=True)
+            st.markdown(week_data['symptoms_html'], unsafe_allow_html=True)
+
+            st.markdown("<h2>Pregnancy Checklist</h2>", unsafe_allow_html=True)
+            st.markdown(week_data['checklist_html'], unsafe_allow_html=True)
+
+            # Display the images
+            st.markdown("<h2>Images</h2>", unsafe_allow_html=True)
+            st.markdown(week_data['images_html'], unsafe_allow_html=True)
+
+
+    # Appointments for the current pregnancy
+    saved_due_date, appointment_book = appointment_store.load(calendar_id) if calendar_id else (None, None)
+    if saved_due_date is not None:
+        st.markdown("<h2>Doctor Appointments</h2>", unsafe_allow_html=True)
+
+        with st.form(key='appointmentForm'):
+            appointment_title = st.text_input("Appointment:", placeholder="Ultrasound with Dr. Smith")
+            appointment_date = st.date_input("Date:")
+            appointment_time = st.time_input("Time:", value=time(9, 0))
+            appointment_minutes = st.number_input("Duration (minutes):", min_value=5, max_value=480, value=30, step=5)
+            add_appointment = st.form_submit_button(label='Add Appointment')
+
+        if add_appointment and appointment_title:
+            appointment_start = datetime.combine(appointment_date, appointment_time)
+            appointment_end = appointment_start + timedelta(minutes=appointment_minutes)
+            clashes = appointment_book.overlapping(appointment_start, appointment_end)
+            if clashes:
+                st.warning(f"This overlaps with: {', '.join(clash.title for clash in clashes)}")
+            appointment_book.add(appointment_store.add(calendar_id, Appointment(appointment_start, appointment_end, appointment_title)))
+
+        upcoming = appointment_book.next_appointments(5)
+        if upcoming:
+            st.markdown("**Upcoming:**")
+            st.markdown('\n'.join(f"- {appointment.start.strftime('%Y-%m-%d %H:%M')}: {appointment.title}" for appointment in upcoming))
+        else:
+            st.write("No upcoming appointments.")
+
+        st.download_button(
+            "Download Calendar (.ics)",
+            # Built only when the button is clicked, not on every rerun
+            data=lambda: ''.join(iter_ical(appointment_book)),
+            file_name='appointments.ics',
+            mime='text/calendar'
         )
-        actual_date = st.date_input("Actual Date:")
-        
-        # Submit button
-        submit_button = st.form_submit_button(label='Submit')
-
-# Process form submission
-if submit_button:
-    if calculation_type == 'Conception Date':
-        due_date = get_date_by_conception(actual_date.strftime('%Y-%m-%d'))
-    else:
-        due_date = get_date_by_lmp(actual_date.strftime('%Y-%m-%d'))
-    
-    st.write(f"Expected Due Date: {due_date.strftime('%Y-%m-%d')}")
-    # Display the selected calculation type and date
-    st.write(f"Calculation Type: {calculation_type}")
-    st.write(f"{calculation_type}: {actual_date}")
-
-    # Calculate the current week of pregnancy
-    week_number = calculate_week_of_pregnancy(str(actual_date), calculation_type)
-    
-    if 1 <= week_number <= 41 :
-        # Display the week number
-        st.write(f"You are in week {week_number}.")
-        percentage_completed = (week_number / 40) * 100
-    
-        # Display doughnut chart
-        col1, col2 = st.columns([2, 2])
-        with col1:
-            fig = plot_doughnut_chart(percentage_completed)
-            st.plotly_chart(fig, use_container_width=True)
-
-        with col2:
-            progress_bar = display_vertical_progress_bar(percentage_completed)
-            st.markdown(progress_bar, unsafe_allow_html=True)
-
-        st.caption("These charts show the progress of your pregnancy based on the current week. The doughnut chart indicates the overall percentage completed in your 40-week pregnancy journey, while the vertical progress bar highlights your progress through each trimester.")
-    else:
-        st.warning("The calculated week number is out of the valid range (1-40). Please check the input date.")
-    dataset = pd.read_csv('weeks.csv')
-
-    # Select data for week 4 (index 3 since index starts from 0)
-    week_data = dataset.iloc[week_number - 2]
-
-    # Extract individual fields
-    baby_development = week_data['babyDevelopment']
-    pregnancy_symptoms = week_data['pregnancySymptoms']
-    pregnancy_checklist = week_data['pregnancyChecklist']
-    images = week_data['images'].split(';')
-
-    # Define CSS style for cards
-    card_style = """
-    <style>
-    .card {
-        border: 1px solid #ccc;
-        border-radius: 8px;
-        padding: 15px;
-        margin-bottom: 15px;
-        box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1);
-    }
-    .card p {
-        margin: 0;
-    }
-    .card ul {
-        margin-top: 5px;
-        padding-left: 20px;
-    }
-    .images-container {
-        display: flex;
-        justify-content: flex-start;
-        margin-top: 15px;
-    }
-    .card-img {
-        height: 20rem;
-        width: 20rem;
-        border-radius: 8px;
-        box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1);
-    }
-    </style>
-    """
-
-    # Display HTML with styled content
-    st.markdown(card_style, unsafe_allow_html=True)
-
-    # Display the cards with data
-    st.markdown("<h2>Baby Development</h2>", unsafe_allow_html=True)
-    st.markdown(f"<div class='card'>{baby_development}</div>", unsafe_allow_html=True)
-
-    st.markdown("<h2>Pregnancy Symptoms</h2>", unsafe_allow_html=True)
-    st.markdown(f"<div class='card'><ul>{''.join([f'<li>{symptom.strip()}</li>' for symptom in pregnancy_symptoms.split(';')])}</ul></div>", unsafe_allow_html=True)
-
-    st.markdown("<h2>Pregnancy Checklist</h2>", unsafe_allow_html=True)
-    st.markdown(f"<div class='card'><ul>{''.join([f'<li>{item.strip()}</li>' for item in pregnancy_checklist.split(';')])}</ul></div>", unsafe_allow_html=True)
-
-    # Display the images
-    st.markdown("<h2>Images</h2>", unsafe_allow_html=True)
-    image_html = "<div class='images-container'>"
-    for image_url in images:
-        image_html += f"<img src='{image_url}' class='card-img'>"
-    image_html += "</div>"
-    st.markdown(image_html, unsafe_allow_html=True)
\ No newline at end of file
+
+    # Clinic-only cohort view
+    if show_cohort_view:
+        # Open the patient cohort store once per process
+        @st.cache_resource()
+        def get_cohort_store():
+            return CohortStore(os.getenv('COHORT_DB_PATH', 'cohort.db'))
+
+        cohort_store = get_cohort_store()
+
+        # Cohort view over the stored patients
+        st.markdown("<h2>Patient Cohort</h2>", unsafe_allow_html=True)
+
+        with st.expander("Load patients"):
+            st.caption("Upload a CSV with the columns patient_id, name, date and calculation_type ('Conception Date' or 'Last Menstrual Period Date').")
+            patients_file = st.file_uploader("Patients CSV", type='csv')
+            if patients_file is not None and st.button("Load Patients"):
+                try:
+                    loaded, skipped = cohort_store.upsert_frame(pd.read_csv(patients_file, dtype={'patient_id': str}))
+                except Exception as e:
+                    st.error(f"Error occurred while loading patients: {str(e)}")
+                else:
+                    st.success(f"Loaded {loaded} patients.")
+                    if skipped:
+                        st.warning(f"Skipped {skipped} rows with a missing patient_id or an unreadable date or calculation type.")
+
+        cohort_query = st.selectbox(
+            'Show patients:',
+            ('In a week of pregnancy', 'With upcoming due dates', 'Entering a trimester')
+        )
+        if cohort_query == 'In a week of pregnancy':
+            cohort_week = st.number_input('Week:', min_value=1, max_value=41, value=12)
+            with span('tracker.cohort_query'):
+                cohort = cohort_store.patients_in_weeks(cohort_week)
+        elif cohort_query == 'With upcoming due dates':
+            cohort_days = st.number_input('Due within days:', min_value=1, max_value=365, value=30)
+            with span('tracker.cohort_query'):
+                cohort = cohort_store.upcoming_due_dates(cohort_days)
+        else:
+            cohort_trimester = st.selectbox('Trimester:', (2, 3), format_func=lambda trimester: ('Second Trimester', 'Third Trimester')[trimester - 2])
+            cohort_days = st.number_input('Within days:', min_value=1, max_value=90, value=7)
+            with span('tracker.cohort_query'):
+                cohort = cohort_store.entering_trimester(cohort_trimester, cohort_days)
+
+        st.write(f"{len(cohort)} of {cohort_store.count()} patients")
+        st.dataframe(cohort, hide_index=True, use_container_width=True)
@@ -1,133 +1,172 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from dotenv import load_dotenv
 import os
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
-import time
-from googleapiclient.discovery import build
+from collections import deque
+from answer_cache import AnswerCache, normalize_query
+from llm_provider import get_provider, load_environment
+from retrieval import build_retrieval_index
+from content_bundle import get_content_store
+from rate_limit import get_limiter
+from tracing import record, span, start_rerun, traced
+from search_provider import get_search_provider
+from youtube_client import QuotaBudget, YouTubeSearch
+from fan_out import iter_completed, run_concurrently, submit_tasks
+from answer_stream import timed_stream
+from chat_context import ChatContext
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file (once per process)
+load_environment()
 
-# Access the API keys
-google_api_key = os.getenv('GOOGLE_API_KEY')
 # Define YouTube API key (replace with your own API key)
 youtube_api_key = os.getenv('YOUTUBE_API_KEY')
+# Stream answers token by token from the model (set STREAM_ANSWERS=0 to wait for the full answer)
+stream_answers = os.getenv('STREAM_ANSWERS', '1') != '0'
 
 st.set_page_config(layout="wide")
-# Initialize Streamlit app title and description
-st.title("Pregnancy AI Assistant")
-st.write("Get quick, reliable answers to your pregnancy-related questions. Leveraging AI to provide accurate and timely information to expectant mothers.")
-
-def stream_data(script):
-    for word in script.split(" "):
-        yield word + " "
-        time.sleep(0.02)
-
-# Initialize the ChatGoogleGenerativeAI instance
-llm = ChatGoogleGenerativeAI(model="gemini-pro", google_api_key=google_api_key)
-
-# Function to perform web scraping based on user query
-def scrape_links(query):
-    # Replace spaces in the query with plus signs for URL encoding
-    query = query.replace(" ", "+")
-    
-    # Example: Using Google search to fetch links related to the query
-    url = f"https://www.google.com/search?q={query}"
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    try:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            search_results = soup.find_all('div', class_='tF2Cxc')
-            
-            links = []
-            for result in search_results:
-                link = result.find('a')['href']
-                links.append(link)
-            
-            return links
-        
-        else:
-            st.error("Failed to retrieve search results.")
-            return None
-    
-    except Exception as e:
-        st.error(f"Error occurred during web scraping: {str(e)}")
-        return None
-
-# Function to fetch YouTube videos using YouTube Data API
-def fetch_youtube_videos(query):
-    youtube = build('youtube', 'v3', developerKey=youtube_api_key)
-    request = youtube.search().list(
-        q=query,
-        part='snippet',
-        type='video',
-        maxResults=3  # Number of videos to fetch (adjust as needed)
-    )
-    response = request.execute()
-    return response.get('items', [])
-
-
-# Display user query input and answer generation button if files are processed
-# Create two columns
-col1, col2 = st.columns([2, 1.4])
-
-# Column 1: Left side for text input
-with col1:
-    user_query = st.text_input(
-        "Ask any pregnancy-related question",
-        placeholder="What are the symptoms in the first trimester?"
-    )
-
-if st.button("Get Answer"):
-    with st.spinner("Generating Answer...."):
-        result = llm.invoke(user_query)
-        st.write("Question: ", user_query)
-        st.write("Answer:")
-        st.write_stream(stream_data(result.content))
-        
-        # Perform web scraping based on the user's query
-        scraped_links = scrape_links(user_query)
+# Everything below is traced as one rerun, including reruns cut short by st.rerun(), st.stop() or an error
+with start_rerun('assistant'):
+    # Initialize Streamlit app title and description
+    st.title("Pregnancy AI Assistant")
+    st.write("Get quick, reliable answers to your pregnancy-related questions. Leveraging AI to provide accurate and timely information to expectant mothers.")
+
+    # The process-wide LLM provider (set LLM_PROVIDER=stub to run without network or API key)
+    llm = get_provider()
+    # Process-wide limiter shared by every session's LLM calls
+    llm_limiter = get_limiter('gemini')
+
+    # Open the on-disk answer cache once per process and provider; answers are cached per provider
+    @st.cache_resource()
+    def get_answer_cache(provider_name):
+        return AnswerCache(os.getenv('ANSWER_CACHE_PATH', 'answer_cache.db'), namespace=provider_name)
+
+    answer_cache = get_answer_cache(llm.name)
+
+    # Build the retrieval index once per version of the compiled content
+    @st.cache_resource(max_entries=1)
+    def get_retrieval_index(version, _content):
+        return build_retrieval_index(_content)
+
+    content = get_content_store().current()
+    retrieval_index = get_retrieval_index(content.version, content)
+
+    # Function to build the prompt for a question, with the conversation so far and matching reference passages
+    def build_prompt(query, context):
+        if context.is_empty():
+            return retrieval_index.grounded_prompt(query)
+        # Follow-up questions often leave out the subject, so passages are matched on the previous question too
+        return retrieval_index.grounded_prompt(query, history=context.render(), search_query=f"{context.last_question()} {query}")
+
+    # Function to find an answer without calling the LLM: repeated opening questions come from the cache
+    # and common questions from the local content. Later turns depend on the conversation, so they skip the cache.
+    def find_local_answer(query, context):
+        cached = answer_cache.get(query) if context.is_empty() else None
+        return cached or retrieval_index.direct_answer(query)
+
+    # Function to answer a query in the context of the conversation so far
+    def get_answer(query, context):
+        answer = find_local_answer(query, context)
+        if answer is None:
+            prompt = build_prompt(query, context)
+            with span('assistant.llm'):
+                answer = llm_limiter.call((normalize_query(query), context.render()), llm.invoke, prompt)
+            if context.is_empty():
+                answer_cache.set(query, answer)
+        return answer
+
+    # Function to stream an answer straight from the model, unless the cache or the local content has it
+    def stream_answer(query, context):
+        answer = find_local_answer(query, context)
+        if answer is not None:
+            st.markdown(answer)
+            return answer
+
+        timings = {}
+        with span('assistant.llm_stream'):
+            # Identical questions asked at the same time share one model stream
+            chunks = llm_limiter.stream((normalize_query(query), context.render()), llm.stream, build_prompt(query, context))
+            st.write_stream(timed_stream(chunks, timings))
+        # The timings go to the logs and the /metrics histograms rather than the page
+        record('assistant.llm_first_token', timings['time_to_first_token'])
+        record('assistant.llm_total', timings['total_time'])
+        if context.is_empty():
+            answer_cache.set(query, timings['answer'])
+        return timings['answer']
+
+    # The process-wide search backend (set SEARCH_PROVIDER=fixture to serve saved result pages offline)
+    search_provider = get_search_provider()
+
+    # Function to find links related to the user query.
+    # The result page is parsed as it streams in and reading stops after the first three links.
+    @traced('assistant.scrape_links')
+    def scrape_links(query):
+        # Errors are raised rather than shown here, as this runs on a worker thread
+        return search_provider.search(query, limit=3)
+
+    # Per-source timeouts in seconds
+    SOURCE_TIMEOUTS = {'answer': 30, 'links': 10, 'videos': 10}
+
+    # Create the YouTube search client once per process
+    @st.cache_resource()
+    def get_youtube_search():
+        # The daily quota count is kept on disk, so restarts do not reset it
+        budget = QuotaBudget(os.getenv('YOUTUBE_QUOTA_PATH', 'youtube_quota.db'))
+        return YouTubeSearch(youtube_api_key, max_results=3, limiter=get_limiter('youtube'), timeout=SOURCE_TIMEOUTS['videos'], budget=budget)  # Number of videos to fetch (adjust as needed)
+
+    youtube_search = get_youtube_search()
+
+    # Function to fetch YouTube videos using YouTube Data API
+    @traced('assistant.youtube')
+    def fetch_youtube_videos(query):
+        return youtube_search.search(query)
+
+
+    # Turns kept on screen per session; older ones live on only in the chat context summary
+    MAX_HISTORY_TURNS = 20
+
+    # Chat history and the token-budgeted context sent to the model, kept per session
+    if 'chat_history' not in st.session_state:
+        st.session_state.chat_history = deque(maxlen=MAX_HISTORY_TURNS)
+        st.session_state.chat_context = ChatContext()
+    chat_history = st.session_state.chat_history
+    chat_context = st.session_state.chat_context
+
+    # Function to display the answer
+    def render_answer(answer):
+        st.markdown(answer)
+
+    # Function to display the scraped links
+    def render_links(scraped_links):
         if scraped_links:
             st.markdown("**Useful Links:**")
             for link in scraped_links[:3]:  # Display up to 3 links
                 st.markdown(f"- [{link}]({link})")
 
-        videos = fetch_youtube_videos(user_query)
+    # Function to display the related videos
+    def render_videos(videos):
         if videos:
             st.markdown("**Related Videos:**")
-            
+
             # Define CSS style for flex container
             st.markdown(
                 """
-                <style>
-                .video-container {
-                    display: flex;
-                    flex-direction: row;
-                    flex-wrap: wrap;
-                    gap: 10px; /* Adjust the gap between videos */
-                    justify-content: flex-start; /* Align items from left to right */
-                }
-                .video-container iframe {
-                    width: 300px; /* Adjust width of each video */
-                    height: 200px; /* Adjust height of each video */
-                    border: 1px solid #ccc; /* Add border for clarity */
-                    border-radius: 10px;
-                }
-                </style>
-                """,
+            <style>
+            .video-container {
+                display: flex;
+                flex-direction: row;
+                flex-wrap: wrap;
+                gap: 10px; /* Adjust the gap between videos */
+                justify-content: flex-start; /* Align items from left to right */
+            }
+            .video-container iframe {
+                width: 300px; /* Adjust width of each video */
+                height: 200px; /* Adjust height of each video */
+                border: 1px solid #ccc; /* Add border for clarity */
+                border-radius: 10px;
+            }
+            </style>
+            """,
                 unsafe_allow_html=True
             )
-            
-            # Start the video container
-            st.markdown('<div class="video-container">', unsafe_allow_html=True)
-            
+
             # Create a list to hold the iframes for each video
             iframe_codes = []
             # Iterate over each video and embed using iframe
@@ -138,9 +177,74 @@ if st.button("Get Answer"):
 
             # Concatenate the iframe codes into a single string
             iframe_codes_str = " ".join(iframe_codes)
-            
+
             # Display the video container with all iframes inside
             st.markdown(f'<div class="video-container">{iframe_codes_str}</div>', unsafe_allow_html=True)
         else:
             st.warning("No videos found.")
 
+    SOURCE_RENDERERS = {'answer': render_answer, 'links': render_links, 'videos': render_videos}
+    SOURCE_ERRORS = {
+        'answer': "Error occurred while generating the answer",
+        'links': "Error occurred during web scraping",
+        'videos': "Error occurred while fetching videos",
+    }
+
+    # Replay the conversation so far
+    for turn in chat_history:
+        with st.chat_message('user'):
+            st.write(turn['question'])
+        with st.chat_message('assistant'):
+            st.markdown(turn['answer'])
+            render_links(turn['links'])
+
+    if chat_history and st.button("New conversation"):
+        chat_history.clear()
+        chat_context.clear()
+        st.rerun()
+
+    user_query = st.chat_input("Ask any pregnancy-related question")
+
+    if user_query:
+        with st.chat_message('user'):
+            st.write(user_query)
+
+        turn = {'question': user_query, 'answer': '', 'links': []}
+        with st.chat_message('assistant'):
+            # Reserve a section per source so each renders in order as soon as its data arrives
+            sections = {name: st.container() for name in SOURCE_RENDERERS}
+
+            with st.spinner("Generating Answer...."):
+                if stream_answers:
+                    # Start the lookups, then stream the answer on the script thread while they run
+                    futures = submit_tasks({
+                        'links': (scrape_links, (user_query,)),
+                        'videos': (fetch_youtube_videos, (user_query,)),
+                    }, SOURCE_TIMEOUTS)
+                    with sections['answer']:
+                        try:
+                            turn['answer'] = stream_answer(user_query, chat_context)
+                        except Exception as e:
+                            st.error(f"{SOURCE_ERRORS['answer']}: {str(e)}")
+                    results = iter_completed(futures, SOURCE_TIMEOUTS)
+                else:
+                    results = run_concurrently({
+                        'answer': (get_answer, (user_query, chat_context)),
+                        'links': (scrape_links, (user_query,)),
+                        'videos': (fetch_youtube_videos, (user_query,)),
+                    }, SOURCE_TIMEOUTS)
+
+                for name, result, error in results:
+                    with sections[name]:
+                        if error is not None:
+                            st.error(f"{SOURCE_ERRORS[name]}: {str(error)}")
+                        else:
+                            with span(f'assistant.render_{name}'):
+                                SOURCE_RENDERERS[name](result)
+                            if name in ('answer', 'links'):
+                                turn[name] = result
+
+        # Only answered turns join the context, so a failed request does not skew follow-ups
+        if turn['answer']:
+            chat_context.add_turn(user_query, turn['answer'])
+            chat_history.append(turn)
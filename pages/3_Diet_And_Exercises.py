@@ -1,15 +1,31 @@
-import pandas as pd
 import streamlit as st
+from content_bundle import TRIMESTERS, get_content_store
+from diet_filters import FoodFilter
+from recommendations import MEAL_PREFERENCES, diet_recommendations, exercise_recommendations, meal_plan
+from quiz_results import build_quiz_results
+from tracing import span, start_rerun
+from video_embed import lazy_youtube_embed
 
 st.set_page_config(layout="wide")
-# Load the data
-diet_data = pd.read_csv('diet_nutrition.csv')
-exercise_data = pd.read_csv('exercise_routines.csv')
-diet_chart_data = pd.read_csv('sample_diet_chart.csv')
-
-# CSS to center-align table headers
-st.markdown(
-    """
+# Everything below is traced as one rerun, including reruns cut short by st.rerun(), st.stop() or an error
+with start_rerun('diet'):
+    # Build the dietary-restriction filters once per version of the compiled content
+    @st.cache_resource(max_entries=1)
+    def load_data(version, _content):
+        with span('diet.load_data'):
+            diet_filter = FoodFilter(_content.frame('diet'), 'examples')
+            meal_filter = FoodFilter(_content.frame('diet_chart'), 'food')
+            return diet_filter, meal_filter, _content.frame('exercises')
+
+    # A change to a source CSV swaps in a new content version, which triggers a rebuild
+    content = get_content_store().current()
+    version = content.version
+    diet_filter, meal_filter, exercise_data = load_data(version, content)
+    diet_chart_data = meal_filter.data
+
+    # CSS to center-align table headers
+    st.markdown(
+        """
     <style>
     th {
         text-align: center !important;
@@ -18,95 +34,101 @@ st.markdown(
     }
     </style>
     """,
-    unsafe_allow_html=True
-)
-
-# Define functions to get recommendations based on user inputs
-def get_custom_diet_recommendations(trimester, dietary_restrictions):
-    recommendations = diet_data[diet_data['trimester'] == trimester].copy()
-
-    # Convert dietary restrictions to lowercase for case-insensitive matching
-    dietary_restrictions = [restriction.lower() for restriction in dietary_restrictions]
-
-    # Filter based on dietary restrictions
-    if 'vegetarian' in dietary_restrictions:
-        recommendations.loc[recommendations['food_group'] == 'Proteins', 'examples'] = recommendations.loc[recommendations['food_group'] == 'Proteins', 'examples'].apply(lambda x: ', '.join([item for item in x.split(', ') if 'meat' not in item and 'fish' not in item]))
-    if 'vegan' in dietary_restrictions:
-        recommendations.loc[recommendations['food_group'] == 'Proteins', 'examples'] = recommendations.loc[recommendations['food_group'] == 'Proteins', 'examples'].apply(lambda x: ', '.join([item for item in x.split(', ') if 'meat' not in item and 'fish' not in item and 'dairy' not in item and 'egg' not in item]))
-    if 'gluten-free' in dietary_restrictions:
-        recommendations.loc[recommendations['food_group'] == 'Whole Grains', 'examples'] = recommendations.loc[recommendations['food_group'] == 'Whole Grains', 'examples'].apply(lambda x: ', '.join([item for item in x.split(', ') if 'wheat' not in item and 'barley' not in item and 'rye' not in item]))
-    if 'lactose intolerant' in dietary_restrictions:
-        recommendations.loc[recommendations['food_group'] == 'Dairy or Alternatives', 'examples'] = recommendations.loc[recommendations['food_group'] == 'Dairy or Alternatives', 'examples'].apply(lambda x: ', '.join([item for item in x.split(', ') if 'milk' not in item and 'yogurt' not in item and 'cheese' not in item]))
-
-    # Reset index to remove row numbers
-    recommendations = recommendations.reset_index(drop=True)
-
-    return recommendations[['food_group', 'examples']]
-
-
-def filter_meals(diet_chart_data, trimester, dietary_restrictions, meal_preference):
-    filtered_meals = diet_chart_data[diet_chart_data['trimester'] == trimester]
-    dietary_restrictions = [restriction.lower() for restriction in dietary_restrictions]
-    
-    for restriction in dietary_restrictions:
-        if restriction == 'lactose intolerant':
-            filtered_meals['food'] = filtered_meals['food'].apply(lambda x: ', '.join([item for item in x.split(', ') if 'milk' not in item.lower() and 'yogurt' not in item.lower() and 'cheese' not in item.lower()]))
-        elif restriction == 'vegetarian':
-            filtered_meals['food'] = filtered_meals['food'].apply(lambda x: ', '.join([item for item in x.split(', ') if 'chicken' not in item.lower() and 'fish' not in item.lower() and 'egg' not in item.lower()]))
-        elif restriction == 'vegan':
-            filtered_meals['food'] = filtered_meals['food'].apply(lambda x: ', '.join([item for item in x.split(', ') if 'milk' not in item.lower() and 'yogurt' not in item.lower() and 'cheese' not in item.lower() and 'egg' not in item.lower()]))
-        elif restriction == 'gluten-free':
-            filtered_meals['food'] = filtered_meals['food'].apply(lambda x: ', '.join([item for item in x.split(', ') if 'wheat' not in item.lower() and 'barley' not in item.lower() and 'rye' not in item.lower()]))
-
-    if meal_preference == '3 main meals':
-        filtered_meals = filtered_meals[filtered_meals['meal'].isin(['Breakfast', 'Lunch', 'Dinner'])]
-    elif meal_preference == '3 main meals with snacks':
-        filtered_meals = filtered_meals
-    elif meal_preference == '2 main meals':
-        filtered_meals = filtered_meals[filtered_meals['meal'].isin(['Lunch', 'Dinner'])]
-
-    return filtered_meals[['meal', 'food']]
-
-
-def get_custom_exercise_recommendations(trimester, exercise_preferences):
-    recommendations = exercise_data[(exercise_data['trimester'] == trimester) & (exercise_data['exercise_type'].isin(exercise_preferences))]
-    return recommendations
-
-# Streamlit app
-st.title("Pregnancy Diet and Exercise Recommendations")
-
-# Create two columns
-col1, col2 = st.columns([2, 0.7])
-
-with col1:
-    with st.form(key='quizForm'):
-        trimester = st.radio('Which trimester are you in?', ['First Trimester', 'Second Trimester', 'Third Trimester'])
-        dietary_restrictions = st.multiselect('Do you have any dietary restrictions?', ['None', 'Vegetarian', 'Vegan', 'Gluten-Free', 'Lactose Intolerant'])
-        meal_preference = st.radio('How many meals do you prefer to have in a day?', ['2 main meals', '3 main meals', '3 main meals with snacks', 'Flexible'])
-        exercise_preferences = st.multiselect('What type of exercises do you enjoy or prefer?', exercise_data['exercise_type'].unique().tolist())
-
-        # Submit button
-        submit_button = st.form_submit_button(label='Submit')
-
-if submit_button:
-    diet_recommendations = get_custom_diet_recommendations(trimester, dietary_restrictions)
-    exercise_recommendations = get_custom_exercise_recommendations(trimester, exercise_preferences)
-    filtered_meals = filter_meals(diet_chart_data, trimester, dietary_restrictions, meal_preference)
+        unsafe_allow_html=True
+    )
+
+    # Define functions to get recommendations based on user inputs
+    def get_custom_diet_recommendations(trimester, dietary_restrictions):
+        return diet_recommendations(diet_filter, trimester, dietary_restrictions)
+
+
+    def filter_meals(diet_chart_data, trimester, dietary_restrictions, meal_preference):
+        # Use the preloaded filter unless a different chart is passed in
+        food_filter = meal_filter if diet_chart_data is meal_filter.data else FoodFilter(diet_chart_data, 'food')
+        return meal_plan(food_filter, trimester, dietary_restrictions, meal_preference)
+
+
+    def get_custom_exercise_recommendations(trimester, exercise_preferences):
+        return exercise_recommendations(exercise_data, trimester, exercise_preferences)
+
+    # CSS for the exercise list, kept unindented so markdown passes it through as HTML
+    EXERCISE_STYLE = """<style>
+.exercise-row {
+    display: grid;
+    grid-template-columns: 1fr 1fr;
+    gap: 1rem;
+    align-items: center;
+}
+.video-container {
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    overflow: hidden;
+    border-radius: 10px;
+    margin: 20px;
+}
+.video-container iframe {
+    border-radius: 10px;
+}
+</style>"""
+
+    # Function to render one exercise with its description points and a click-to-load video
+    def render_exercise(row):
+        description_points = ''.join(f"<li>{point}</li>" for point in row['description'].split('. '))
+        return (
+            f'<div class="exercise-row"><div><h5>{row["exercise"]}</h5><ul>{description_points}</ul></div>'
+            f'<div class="video-container">{lazy_youtube_embed(row["video_id"], row["exercise"])}</div></div>'
+        )
+
+    # Precompute the results for every quiz combination once per content version
+    @st.cache_resource(max_entries=1)
+    def warm_up_quiz_results(version):
+        with span('diet.warm_up'):
+            return build_quiz_results(
+                TRIMESTERS,
+                MEAL_PREFERENCES,
+                lambda trimester, restrictions: get_custom_diet_recommendations(trimester, restrictions).rename(columns={'food_group': 'Food Group', 'examples': 'Examples'}).to_html(index=False),
+                lambda trimester, restrictions, preference: filter_meals(diet_chart_data, trimester, restrictions, preference).to_html(index=False, header=False),
+                exercise_data,
+                render_exercise
+            )
+
+    quiz_results = warm_up_quiz_results(version)
+
+    # Streamlit app
+    st.title("Pregnancy Diet and Exercise Recommendations")
 
     # Create two columns
-    col1, col2, col3 = st.columns([1, 0.1, 1])
+    col1, col2 = st.columns([2, 0.7])
+
     with col1:
-        # Display Custom Diet Recommendations
-        st.subheader('Diet Recommendations')
-        st.markdown(
-            diet_recommendations.rename(columns={'food_group': 'Food Group', 'examples': 'Examples'}).to_html(index=False),
-            unsafe_allow_html=True
-        )
+        with st.form(key='quizForm'):
+            trimester = st.radio('Which trimester are you in?', TRIMESTERS)
+            dietary_restrictions = st.multiselect('Do you have any dietary restrictions?', ['None', 'Vegetarian', 'Vegan', 'Gluten-Free', 'Lactose Intolerant'])
+            meal_preference = st.radio('How many meals do you prefer to have in a day?', MEAL_PREFERENCES)
+            exercise_preferences = st.multiselect('What type of exercises do you enjoy or prefer?', exercise_data['exercise_type'].unique().tolist())
+
+            # Submit button
+            submit_button = st.form_submit_button(label='Submit')
+
+    if submit_button:
+        # Look up the precomputed results
+        with span('diet.lookup'):
+            diet_table_html = quiz_results.diet_table(trimester, dietary_restrictions)
+            meal_chart_html = quiz_results.meal_chart(trimester, dietary_restrictions, meal_preference)
+            exercise_list = quiz_results.exercise_list(trimester, exercise_preferences)
+
+        # Create two columns
+        col1, col2, col3 = st.columns([1, 0.1, 1])
+        with col1:
+            # Display Custom Diet Recommendations
+            st.subheader('Diet Recommendations')
+            st.markdown(diet_table_html, unsafe_allow_html=True)
 
-    with col2:
-        # Add vertical divider line between columns
-        st.html(
-            '''
+        with col2:
+            # Add vertical divider line between columns
+            st.html(
+                '''
                 <div class="divider-vertical-line"></div>
                 <style>
                     .divider-vertical-line {
@@ -116,49 +138,18 @@ if submit_button:
                     }
                 </style>
             '''
-        )
-
-    with col3:
-        # Display Custom Diet Plan
-        st.subheader('Sample Diet Chart')
-        st.markdown(
-            filtered_meals.to_html(index=False, header=False),
-            unsafe_allow_html=True
-        )
-
-    # Display Custom Exercise Recommendations
-    st.subheader('Exercise Recommendations')
-    st.markdown("""
-        <style>
-            .video-container {
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                overflow: hidden;
-                border-radius: 10px;
-                margin: 20px;
-            }
-                
-            .video-container iframe {
-                border-radius: 10px;
-            }
-        </style>
-    """, unsafe_allow_html=True)
-
-    for index, row in exercise_recommendations.iterrows():
-        col1, col2 = st.columns([1, 1])
-        with col1:
-            st.markdown(f"<h5>{row['exercise']}</h5>", unsafe_allow_html=True)
-            description_points = row['description'].split('. ')
-            st.markdown("<ul>", unsafe_allow_html=True)
-            for point in description_points:
-                st.markdown(f"<li>{point}</li>", unsafe_allow_html=True)
-            st.markdown("</ul>", unsafe_allow_html=True)
-        with col2:
-            iframe_code = f'''
-            <div class="video-container">
-                <iframe width="360" height="200" src="https://www.youtube.com/embed/{row['video_id']}" title="YouTube video player" frameborder="0" allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" referrerpolicy="strict-origin-when-cross-origin" allowfullscreen></iframe>
-            </div>
-            '''
-            st.markdown(iframe_code, unsafe_allow_html=True)
-
+            )
+
+        with col3:
+            # Display Custom Diet Plan
+            st.subheader('Sample Diet Chart')
+            st.markdown(meal_chart_html, unsafe_allow_html=True)
+
+        # Display Custom Exercise Recommendations
+        st.subheader('Exercise Recommendations')
+        # Render the whole exercise list as a single HTML block
+        with span('diet.render_exercises'):
+            st.markdown(
+                EXERCISE_STYLE + '<div class="exercise-list">' + ''.join(row['html'] for row in exercise_list) + '</div>',
+                unsafe_allow_html=True
+            )
@@ -0,0 +1,109 @@
+import argparse
+import sys
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+CONCEPTION = 'Conception Date'
+LMP = 'Last Menstrual Period Date'
+
+# Short names accepted alongside the labels used on the tracker page
+CALCULATION_TYPES = {
+    CONCEPTION: CONCEPTION,
+    LMP: LMP,
+    'conception': CONCEPTION,
+    'lmp': LMP,
+}
+
+# Weeks from the given date to the due date
+WEEKS_TO_DUE_DATE = {CONCEPTION: 38, LMP: 40}
+# Days the start date is shifted back before counting weeks
+START_OFFSET_DAYS = {CONCEPTION: 0, LMP: 14}
+
+
+# Function to convert dates given as strings, dates or datetime64 values into a datetime64[D] array
+def to_days(dates):
+    return np.asarray(dates, dtype='datetime64[D]')
+
+# Function to return a boolean mask per calculation type, raising on unknown types
+def split_calculation_types(calculation_types, shape):
+    types = np.broadcast_to(np.asarray(calculation_types, dtype=object), shape)
+    normalized = [CALCULATION_TYPES.get(value) for value in types.ravel()]
+    if None in normalized:
+        raise ValueError('Invalid calculation type. Please specify either "conception" or "lmp".')
+    return (np.array(normalized, dtype=object) == CONCEPTION).reshape(shape)
+
+# Function to convert a single datetime64 value back into a datetime
+def as_datetime(value):
+    return np.datetime64(value, 'us').item()
+
+# Function to calculate due dates for arrays of dates and calculation types
+def due_dates(dates, calculation_types):
+    days = to_days(dates)
+    is_conception = split_calculation_types(calculation_types, days.shape)
+    weeks = np.where(is_conception, WEEKS_TO_DUE_DATE[CONCEPTION], WEEKS_TO_DUE_DATE[LMP])
+    return days + (weeks * 7).astype('timedelta64[D]')
+
+# Function to calculate the current week of pregnancy for arrays of dates as of a given day (default today)
+def weeks_of_pregnancy(dates, calculation_types, as_of=None):
+    days = to_days(dates)
+    is_conception = split_calculation_types(calculation_types, days.shape)
+    as_of = np.datetime64('today', 'D') if as_of is None else to_days(as_of)
+    offset = np.where(is_conception, START_OFFSET_DAYS[CONCEPTION], START_OFFSET_DAYS[LMP]).astype('timedelta64[D]')
+
+    # Pregnancy is counted from the start of the LMP or conception, so week 1 starts on day 0
+    days_elapsed = (as_of - (days - offset)).astype(np.int64)
+    return days_elapsed // 7 + 1
+
+
+# Function to add due date and week columns to one chunk of patients
+def process_chunk(chunk, date_column, type_column, default_type, as_of):
+    dates = pd.to_datetime(chunk[date_column], errors='coerce').to_numpy(dtype='datetime64[D]')
+    types = chunk[type_column].map(CALCULATION_TYPES) if type_column else pd.Series(default_type, index=chunk.index)
+
+    # Rows with an unreadable date or type are left blank instead of failing the whole file
+    valid = ~np.isnat(dates) & types.notna().to_numpy()
+    due = np.full(len(chunk), np.datetime64('NaT'), dtype='datetime64[D]')
+    weeks = pd.array([None] * len(chunk), dtype='Int64')
+    if valid.any():
+        valid_types = types.to_numpy(dtype=object)[valid]
+        due[valid] = due_dates(dates[valid], valid_types)
+        weeks[valid] = weeks_of_pregnancy(dates[valid], valid_types, as_of)
+
+    chunk = chunk.copy()
+    chunk['due_date'] = due
+    chunk['week'] = weeks
+    return chunk
+
+# Function to stream a patient CSV through the date engine in fixed-size chunks
+def process_csv(source, destination, date_column='date', type_column=None, default_type=LMP,
+                as_of=None, chunk_size=50000):
+    header = True
+    for chunk in pd.read_csv(source, chunksize=chunk_size):
+        process_chunk(chunk, date_column, type_column, default_type, as_of).to_csv(
+            destination, header=header, index=False, date_format='%Y-%m-%d'
+        )
+        header = False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Add due dates and current pregnancy weeks to a CSV of patients.')
+    parser.add_argument('input', help="input CSV file, or '-' for stdin")
+    parser.add_argument('output', help="output CSV file, or '-' for stdout")
+    parser.add_argument('--date-column', default='date', help='column holding the LMP or conception date')
+    parser.add_argument('--type-column', help='column holding the calculation type of each row')
+    parser.add_argument('--type', default='lmp', choices=sorted(CALCULATION_TYPES),
+                        help='calculation type used when no type column is given')
+    parser.add_argument('--as-of', help='date to calculate weeks for (YYYY-MM-DD, default today)')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='rows processed per chunk')
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else args.input
+    with open(args.output, 'w', newline='') if args.output != '-' else nullcontext(sys.stdout) as destination:
+        process_csv(source, destination, args.date_column, args.type_column,
+                    CALCULATION_TYPES[args.type], args.as_of, args.chunk_size)
+
+
+if __name__ == '__main__':
+    main()
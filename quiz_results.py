@@ -0,0 +1,47 @@
+import heapq
+from itertools import combinations
+
+from diet_filters import RESTRICTION_MASKS, restriction_mask
+
+# Precomputed diet/meal HTML for every quiz combination plus exercises indexed by trimester and type
+class QuizResults:
+    def __init__(self, diet_tables, meal_charts, exercises):
+        self.diet_tables = diet_tables
+        self.meal_charts = meal_charts
+        self.exercises = exercises
+
+    def diet_table(self, trimester, dietary_restrictions):
+        return self.diet_tables[(trimester, restriction_mask(dietary_restrictions))]
+
+    def meal_chart(self, trimester, dietary_restrictions, meal_preference):
+        return self.meal_charts[(trimester, restriction_mask(dietary_restrictions), meal_preference)]
+
+    # Function to compose the exercise list for several types, keeping the CSV order
+    def exercise_list(self, trimester, exercise_preferences):
+        groups = [self.exercises.get((trimester, exercise_type), []) for exercise_type in set(exercise_preferences)]
+        return [record for _, record in heapq.merge(*groups, key=lambda entry: entry[0])]
+
+
+# Function to render every diet table and meal chart and index the exercises.
+# Restriction subsets that exclude the same attributes share one entry.
+# When given, render_exercise pre-renders each exercise into its record's 'html' field.
+def build_quiz_results(trimesters, meal_preferences, render_diet_table, render_meal_chart, exercise_data, render_exercise=None):
+    diet_tables = {}
+    meal_charts = {}
+    for size in range(len(RESTRICTION_MASKS) + 1):
+        for restrictions in combinations(RESTRICTION_MASKS, size):
+            mask = restriction_mask(restrictions)
+            for trimester in trimesters:
+                if (trimester, mask) in diet_tables:
+                    continue
+                diet_tables[(trimester, mask)] = render_diet_table(trimester, list(restrictions))
+                for meal_preference in meal_preferences:
+                    meal_charts[(trimester, mask, meal_preference)] = render_meal_chart(trimester, list(restrictions), meal_preference)
+
+    exercises = {}
+    for position, record in enumerate(exercise_data.to_dict('records')):
+        if render_exercise is not None:
+            record['html'] = render_exercise(record)
+        exercises.setdefault((record['trimester'], record['exercise_type']), []).append((position, record))
+
+    return QuizResults(diet_tables, meal_charts, exercises)
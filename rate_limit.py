@@ -0,0 +1,231 @@
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+
+
+class ServiceBusy(RuntimeError):
+    pass
+
+
+_deadlines = threading.local()
+
+# Context manager setting the time (on the time.monotonic() clock) by which this thread's calls must finish.
+# Limiter waits never run past it, so a call that has already timed out does not keep holding a worker thread.
+@contextmanager
+def deadline(at):
+    previous = getattr(_deadlines, 'at', None)
+    _deadlines.at = at
+    try:
+        yield
+    finally:
+        _deadlines.at = previous
+
+# Function to return how long this thread may wait, capped by its deadline if one is set
+def wait_budget(timeout):
+    at = getattr(_deadlines, 'at', None)
+    if at is None:
+        return timeout
+    return max(0, min(timeout, at - time.monotonic()))
+
+
+# Token bucket refilled at `rate` tokens per second, holding at most `capacity`
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # Function to take one token, waiting until `deadline` at most; returns False on timeout
+    def acquire(self, deadline):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+# Chunks of one in-flight stream, replayed to every identical request that joins it
+class SharedStream:
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._condition = threading.Condition()
+
+    def append(self, chunk):
+        with self._condition:
+            self.chunks.append(chunk)
+            self._condition.notify_all()
+
+    def finish(self, error=None):
+        with self._condition:
+            self.done = True
+            self.error = error
+            self._condition.notify_all()
+
+    # Function to yield every chunk, from the first, as the leading request receives them.
+    # Raises TimeoutError when the stream has not ended within `timeout` seconds.
+    def replay(self, timeout):
+        deadline = time.monotonic() + timeout
+        index = 0
+        while True:
+            with self._condition:
+                while index == len(self.chunks) and not self.done:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError()
+                    self._condition.wait(remaining)
+                chunks = self.chunks[index:]
+                done, error = self.done, self.error
+            index += len(chunks)
+            yield from chunks
+            if done:
+                if error is not None:
+                    raise error
+                return
+
+
+# Process-wide limiter for one upstream provider: a token bucket for the request rate,
+# a cap on in-flight requests, a bounded wait queue that sheds load, and coalescing of
+# identical in-flight requests so duplicates share one upstream call.
+# A leading request may wait wait_timeout for a slot and then run for call_timeout,
+# so duplicates wait for both before giving up.
+class ProviderLimiter:
+    def __init__(self, name, rate, burst, max_in_flight, max_waiting, wait_timeout, call_timeout):
+        self.name = name
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.call_timeout = call_timeout
+        self._bucket = TokenBucket(rate, burst)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._waiting = 0
+        self._calls = {}
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def _busy(self):
+        return ServiceBusy(f"Too many requests to {self.name} right now. Please try again in a moment.")
+
+    # Context manager counting one request in the wait queue, raising ServiceBusy when the queue is full
+    @contextmanager
+    def _queued(self):
+        with self._lock:
+            if self._waiting >= self.max_waiting:
+                raise self._busy()
+            self._waiting += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    # Context manager holding one in-flight slot, raising ServiceBusy when the queue is full or the wait times out
+    @contextmanager
+    def slot(self):
+        with self._queued():
+            timeout = wait_budget(self.wait_timeout)
+            acquired = self._slots.acquire(timeout=timeout)
+            if acquired and not self._bucket.acquire(time.monotonic() + timeout):
+                self._slots.release()
+                acquired = False
+        if not acquired:
+            raise self._busy()
+
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    # Function to call func(*args) under the limiter, sharing the result with identical in-flight calls
+    def call(self, key, func, *args):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            # Duplicates waiting for the shared result count towards the wait queue too
+            with self._queued():
+                try:
+                    return future.result(timeout=wait_budget(self.wait_timeout + self.call_timeout))
+                except FutureTimeoutError:
+                    raise self._busy()
+
+        try:
+            with self.slot():
+                result = func(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    # Function to consume a stream under the limiter, holding the slot until the stream ends.
+    # Identical in-flight streams share one upstream stream: later requests replay its chunks.
+    def stream(self, key, func, *args):
+        with self._lock:
+            shared = self._streams.get(key)
+            leader = shared is None
+            if leader:
+                shared = self._streams[key] = SharedStream()
+
+        if not leader:
+            with self._queued():
+                try:
+                    yield from shared.replay(wait_budget(self.wait_timeout + self.call_timeout))
+                except TimeoutError:
+                    raise self._busy()
+            return
+
+        try:
+            with self.slot():
+                for chunk in func(*args):
+                    shared.append(chunk)
+                    yield chunk
+        except Exception as e:
+            shared.finish(e)
+            raise
+        except BaseException:
+            # The leading request stopped reading (e.g. its session reran), so the rest of the answer never arrives
+            shared.finish(self._busy())
+            raise
+        else:
+            shared.finish()
+        finally:
+            with self._lock:
+                del self._streams[key]
+
+
+# Limits per provider: requests per second, burst, in-flight cap, wait queue size,
+# slot wait timeout and call timeout in seconds (matching the page's source timeouts)
+PROVIDER_LIMITS = {
+    'gemini': dict(rate=1.0, burst=5, max_in_flight=8, max_waiting=32, wait_timeout=20, call_timeout=30),
+    'search': dict(rate=2.0, burst=5, max_in_flight=8, max_waiting=32, wait_timeout=10, call_timeout=10),
+    'youtube': dict(rate=1.0, burst=3, max_in_flight=4, max_waiting=16, wait_timeout=10, call_timeout=10),
+}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+# Function to get the process-wide limiter for a provider
+def get_limiter(name):
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = ProviderLimiter(name, **PROVIDER_LIMITS[name])
+        return _limiters[name]
@@ -0,0 +1,34 @@
+from diet_filters import restriction_mask
+
+MEAL_PREFERENCES = ['2 main meals', '3 main meals', '3 main meals with snacks', 'Flexible']
+# Meals kept for each meal preference; the other preferences keep every meal
+PREFERENCE_MEALS = {
+    '3 main meals': ['Breakfast', 'Lunch', 'Dinner'],
+    '2 main meals': ['Lunch', 'Dinner'],
+}
+
+
+# Function to get a trimester's food groups with the items excluded by any of the dietary restrictions dropped
+def diet_recommendations(diet_filter, trimester, dietary_restrictions):
+    recommendations = diet_filter.apply(diet_filter.data['trimester'] == trimester, restriction_mask(dietary_restrictions))
+
+    # Reset index to remove row numbers
+    recommendations = recommendations.reset_index(drop=True)
+
+    return recommendations[['food_group', 'examples']]
+
+# Function to get a trimester's sample meals for the dietary restrictions and meal preference
+def meal_plan(meal_filter, trimester, dietary_restrictions, meal_preference):
+    chart = meal_filter.data
+    filtered_meals = meal_filter.apply(chart['trimester'] == trimester, restriction_mask(dietary_restrictions))
+
+    meals = PREFERENCE_MEALS.get(meal_preference)
+    if meals is not None:
+        filtered_meals = filtered_meals[filtered_meals['meal'].isin(meals)]
+
+    return filtered_meals[['meal', 'food']]
+
+# Function to get a trimester's exercises of the preferred types, in CSV order
+def exercise_recommendations(exercise_data, trimester, exercise_preferences):
+    return exercise_data[(exercise_data['trimester'] == trimester) & (exercise_data['exercise_type'].isin(exercise_preferences))]
+
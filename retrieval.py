@@ -0,0 +1,136 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+from answer_cache import normalize_query
+from week_content import build_week_store
+
+# Words too common to help ranking
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'at', 'be', 'can', 'do', 'doe', 'for', 'how', 'i', 'in', 'is', 'it',
+    'my', 'of', 'on', 'or', 'should', 'the', 'to', 'what', 'when', 'which', 'with', 'you', 'your',
+}
+
+# Question words mapped to the week fields they ask about
+WEEK_TOPICS = {
+    'symptoms': ['symptom', 'symptoms', 'feel', 'feeling', 'sign', 'signs'],
+    'checklist': ['checklist', 'todo', 'prepare', 'preparing'],
+    'development': ['baby', 'development', 'develop', 'developing', 'grow', 'growing', 'growth', 'size', 'fetus'],
+}
+CHECKLIST_PHRASE = re.compile(r'\b(?:should i do|to do)\b')
+WEEK_PATTERN = re.compile(r'\bweek\s*(\d{1,2})\b|\b(\d{1,2})(?:st|nd|rd|th)?\s*week\b')
+WEEK_NUMBER = re.compile(r'\d{1,2}(?:st|nd|rd|th)?')
+# Words that can surround a week and topic without changing what is being asked
+DIRECT_FILLER_WORDS = [
+    'week', 'weeks', 'pregnancy', 'pregnant', 'common', 'usual', 'typical', 'expect', 'happen', 'happening',
+    'this', 'am', 'get', 'have', 'there', 'any', 'tell', 'me', 'about', 'list', 'during', 'by', 'will', 's', 'im',
+]
+
+
+# Function to split text into normalized terms, reusing the answer cache's normalization
+def tokenize(text):
+    return [term for term in normalize_query(text).split() if term not in STOP_WORDS]
+
+# Normalized terms of each topic, and every term a directly answered question may contain
+TOPIC_TERMS = {topic: set(tokenize(' '.join(words))) for topic, words in WEEK_TOPICS.items()}
+DIRECT_ANSWER_TERMS = set(tokenize(' '.join(DIRECT_FILLER_WORDS))).union(*TOPIC_TERMS.values())
+
+# Function to turn the bundled CSVs into short passages
+def build_passages(week_store, diet_data, exercise_data, diet_chart_data):
+    passages = []
+    for week, entry in sorted(week_store.items()):
+        passages.append(f"Week {week} baby development: {entry['baby_development']}")
+        passages.append(f"Week {week} pregnancy symptoms: " + '; '.join(entry['symptoms']))
+        passages.append(f"Week {week} pregnancy checklist: " + '; '.join(entry['checklist']))
+    for trimester, rows in diet_data.groupby('trimester', sort=False):
+        passages.append(f"{trimester} diet and nutrition: " + '; '.join(f"{row.food_group}: {row.examples}" for row in rows.itertuples()))
+    for trimester, rows in diet_chart_data.groupby('trimester', sort=False):
+        passages.append(f"{trimester} sample diet chart: " + '; '.join(f"{row.meal}: {row.food}" for row in rows.itertuples()))
+    for row in exercise_data.itertuples():
+        passages.append(f"{row.trimester} exercise, {row.exercise} ({row.exercise_type}): {row.description}")
+    return passages
+
+
+# BM25 index over the passages, built once per process as an inverted index
+class RetrievalIndex:
+    def __init__(self, passages, week_store, k1=1.5, b=0.75):
+        self.passages = passages
+        self.week_store = week_store
+        self.k1 = k1
+        self.b = b
+
+        self.postings = defaultdict(list)
+        self.lengths = []
+        for doc_id, passage in enumerate(passages):
+            terms = Counter(tokenize(passage))
+            self.lengths.append(sum(terms.values()))
+            for term, count in terms.items():
+                self.postings[term].append((doc_id, count))
+        self.average_length = sum(self.lengths) / max(len(self.lengths), 1)
+        self.idf = {
+            term: math.log(1 + (len(passages) - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    # Function to return the top k (score, passage) pairs for a query
+    def search(self, query, k=3):
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, count in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / self.average_length)
+                scores[doc_id] += idf * count * (self.k1 + 1) / (count + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(score, self.passages[doc_id]) for doc_id, score in ranked]
+
+    # Function to answer "symptoms in week 8" style questions straight from weeks.csv.
+    # Returns None unless the question names exactly one week and one topic and nothing else:
+    # any other term (a symptom, a food, a worry) needs a real answer, so it goes to the LLM.
+    def direct_answer(self, query):
+        text = query.lower()
+        weeks = {int(first or second) for first, second in WEEK_PATTERN.findall(text)}
+        terms = tokenize(text)
+        topics = {topic for topic, topic_terms in TOPIC_TERMS.items() if topic_terms.intersection(terms)}
+        if CHECKLIST_PHRASE.search(text):
+            topics.add('checklist')
+        if len(weeks) != 1 or len(topics) != 1:
+            return None
+        if any(term not in DIRECT_ANSWER_TERMS and not WEEK_NUMBER.fullmatch(term) for term in terms):
+            return None
+        entry = self.week_store.get(weeks.pop())
+        if entry is None:
+            return None
+
+        topic = topics.pop()
+        if topic == 'development':
+            return f"**Week {entry['week']} baby development:** {entry['baby_development']}"
+        title = 'pregnancy symptoms' if topic == 'symptoms' else 'pregnancy checklist'
+        return f"**Week {entry['week']} {title}:**\n" + '\n'.join(f"- {item}" for item in entry[topic])
+
+    # Function to build the LLM prompt with the best matching passages as grounding context.
+    # `history` is the conversation so far (see chat_context.py); `search_query` overrides the text passages are matched on.
+    def grounded_prompt(self, query, k=3, min_score=1.0, history='', search_query=None):
+        passages = [passage for score, passage in self.search(search_query or query, k) if score >= min_score]
+        context = '\n'.join(f"- {passage}" for passage in passages)
+        if history:
+            reference = f"Reference information:\n{context}\n\n" if passages else ''
+            return (
+                "Answer the pregnancy-related question below, which continues the conversation that follows. "
+                "Use the reference information where it is relevant.\n"
+                f"{history}\n\n{reference}Question: {query}"
+            )
+        if not passages:
+            return query
+        return (
+            "Answer the pregnancy-related question below. Use the following reference information where it is relevant.\n"
+            f"{context}\n\nQuestion: {query}"
+        )
+
+
+# Function to build the index from the compiled content bundle
+def build_retrieval_index(bundle):
+    week_store = build_week_store(bundle.frame('weeks'))
+    passages = build_passages(week_store, bundle.frame('diet'), bundle.frame('exercises'), bundle.frame('diet_chart'))
+    return RetrievalIndex(passages, week_store)
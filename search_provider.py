@@ -0,0 +1,126 @@
+import os
+import threading
+from html.parser import HTMLParser
+
+from answer_cache import normalize_query
+
+FIXTURE_DIR = os.path.join('fixtures', 'search')
+
+
+# Incremental parser that collects the first link of each search result and stops after `limit` links.
+# A result is any `result_tag` element whose class list contains `result_class`.
+class ResultLinkParser(HTMLParser):
+    def __init__(self, limit=3, result_tag='div', result_class='tF2Cxc'):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.result_tag = result_tag
+        self.result_class = result_class
+        self.links = []
+        self.done = limit <= 0
+        self._depth = 0
+        self._has_link = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if self._depth:
+            if tag == self.result_tag:
+                self._depth += 1
+            elif tag == 'a' and not self._has_link:
+                href = dict(attrs).get('href')
+                if href:
+                    self._has_link = True
+                    self.links.append(href)
+                    self.done = len(self.links) >= self.limit
+        elif tag == self.result_tag and self.result_class in (dict(attrs).get('class') or '').split():
+            self._depth = 1
+            self._has_link = False
+
+    def handle_endtag(self, tag):
+        if self._depth and tag == self.result_tag:
+            self._depth -= 1
+
+# Function to extract result links from a page arriving in text chunks, reading no further than needed
+def extract_links(chunks, limit=3, result_tag='div', result_class='tF2Cxc'):
+    parser = ResultLinkParser(limit, result_tag, result_class)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return parser.links
+
+# Function to read a file in text chunks, as a response would arrive
+def iter_file(path, chunk_size=16384):
+    with open(path, encoding='utf-8') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+# Search backend that streams a result page over HTTP and extracts links as it arrives
+class HtmlSearchProvider:
+    def __init__(self, http_client, url='https://www.google.com/search', query_param='q',
+                 result_tag='div', result_class='tF2Cxc'):
+        self.http_client = http_client
+        self.url = url
+        self.query_param = query_param
+        self.result_tag = result_tag
+        self.result_class = result_class
+
+    def search(self, query, limit=3):
+        return self.http_client.get_streamed(
+            self.url,
+            {self.query_param: query},
+            lambda chunks: extract_links(chunks, limit, self.result_tag, self.result_class),
+            cache_key=limit
+        )
+
+# Offline backend serving result pages from disk, for tests, benchmarks and running without network.
+# The pages in fixtures/search are synthetic: generated to match a real results page's size and markup.
+# A query is served from <directory>/<normalized-query>.html, falling back to default.html.
+class FixtureSearchProvider:
+    def __init__(self, directory=FIXTURE_DIR, result_tag='div', result_class='tF2Cxc'):
+        self.directory = directory
+        self.result_tag = result_tag
+        self.result_class = result_class
+
+    def page_path(self, query):
+        path = os.path.join(self.directory, normalize_query(query).replace(' ', '-') + '.html')
+        if os.path.exists(path):
+            return path
+        return os.path.join(self.directory, 'default.html')
+
+    def search(self, query, limit=3):
+        return extract_links(iter_file(self.page_path(query)), limit, self.result_tag, self.result_class)
+
+
+# Function to create the search backend selected by the environment.
+# SEARCH_PROVIDER picks the backend ('html' or 'fixture'); SEARCH_URL and SEARCH_RESULT_CLASS
+# point the HTML backend at another search page, and SEARCH_FIXTURE_DIR sets the result pages folder.
+def create_search_provider(http_client=None):
+    backend = os.getenv('SEARCH_PROVIDER', 'html').lower()
+    result_class = os.getenv('SEARCH_RESULT_CLASS', 'tF2Cxc')
+    if backend == 'fixture':
+        return FixtureSearchProvider(os.getenv('SEARCH_FIXTURE_DIR', FIXTURE_DIR), result_class=result_class)
+    if backend == 'html':
+        if http_client is None:
+            from http_client import HttpClient
+            from rate_limit import get_limiter
+
+            http_client = HttpClient(limiter=get_limiter('search'))
+        return HtmlSearchProvider(http_client, os.getenv('SEARCH_URL', 'https://www.google.com/search'), result_class=result_class)
+    raise ValueError(f'Unknown search provider "{backend}". Please specify either "html" or "fixture".')
+
+_provider = None
+_provider_lock = threading.Lock()
+
+# Function to get the process-wide search provider, created on first use
+def get_search_provider():
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = create_search_provider()
+    return _provider
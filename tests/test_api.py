@@ -0,0 +1,177 @@
+import asyncio
+import json
+import os
+import shutil
+
+import pytest
+
+from api import MAX_HEADER_BYTES, ContentApi, serve_connection
+from content_bundle import SOURCES, ContentStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def api(tmp_path_factory):
+    # Compile a private copy of the content so the tests never write next to the app's files
+    base_dir = tmp_path_factory.mktemp('content')
+    for file_name in SOURCES.values():
+        shutil.copy(os.path.join(ROOT, file_name), base_dir)
+    return ContentApi(ContentStore(str(base_dir)))
+
+
+# Function to send raw bytes to a connection served by serve_connection and return everything it sends back
+async def exchange_async(api, data, idle_timeout):
+    server = await asyncio.start_server(
+        lambda reader, writer: serve_connection(api, reader, writer, idle_timeout),
+        '127.0.0.1', 0, limit=MAX_HEADER_BYTES
+    )
+    async with server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+        writer.write(data)
+        await writer.drain()
+        # The server closes the connection after Connection: close, an error, or the idle timeout
+        received = await asyncio.wait_for(reader.read(), idle_timeout + 5)
+        writer.close()
+        return received
+
+def exchange(api, data, idle_timeout=0.3):
+    return asyncio.run(exchange_async(api, data, idle_timeout))
+
+# Function to split a byte stream into (status, headers, body) responses; `bodies` says which responses carry one
+def parse_responses(raw, bodies=None):
+    responses = []
+    while raw:
+        head, _, raw = raw.partition(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        headers = dict(line.split(': ', 1) for line in lines[1:])
+        status = int(lines[0].split(' ')[1])
+        has_body = status != 304 and (bodies is None or bodies[len(responses)])
+        length = int(headers.get('Content-Length', 0)) if has_body else 0
+        responses.append((status, headers, raw[:length]))
+        raw = raw[length:]
+    return responses
+
+def request(target, method='GET', version='HTTP/1.1', headers=''):
+    return f'{method} {target} {version}\r\nHost: localhost\r\n{headers}\r\n'.encode('latin-1')
+
+
+def test_week_response_has_etag_and_cache_headers(api):
+    [(status, headers, body)] = parse_responses(exchange(api, request('/v1/weeks/12')))
+    assert status == 200
+    assert headers['Content-Type'] == 'application/json; charset=utf-8'
+    assert headers['Cache-Control'] == 'public, max-age=300'
+    assert 'Date' in headers and 'ETag' in headers
+    assert json.loads(body)['week'] == 12
+
+def test_matching_etag_gets_not_modified(api):
+    etag = api.handle('/v1/weeks/12').etag
+    [(status, headers, body)] = parse_responses(exchange(api, request('/v1/weeks/12', headers=f'If-None-Match: {etag}\r\n')))
+    assert status == 304
+    assert headers['ETag'] == etag
+    assert body == b''
+
+def test_head_sends_headers_only(api):
+    raw = exchange(api, request('/v1/weeks/12', method='HEAD') + request('/health'))
+    (status, headers, body), (health_status, _, health_body) = parse_responses(raw, bodies=[False, True])
+    assert status == 200 and int(headers['Content-Length']) > 0 and body == b''
+    assert health_status == 200 and json.loads(health_body) == {'status': 'ok'}
+
+def test_pipelined_requests_are_answered_in_order(api):
+    raw = exchange(api, request('/v1/weeks/8') + request('/v1/weeks/9') + request('/v1/weeks/10'))
+    assert [json.loads(body)['week'] for _, _, body in parse_responses(raw)] == [8, 9, 10]
+
+def test_request_body_is_skipped(api):
+    raw = exchange(api, request('/v1/weeks/8', headers='Content-Length: 5\r\n') + b'hello' + request('/v1/weeks/9'))
+    assert [json.loads(body)['week'] for _, _, body in parse_responses(raw)] == [8, 9]
+
+def test_http_10_closes_unless_keep_alive(api):
+    [(status, headers, _)] = parse_responses(exchange(api, request('/health', version='HTTP/1.0') + request('/health')))
+    assert status == 200 and headers['Connection'] == 'close'
+
+    raw = exchange(api, request('/health', version='HTTP/1.0', headers='Connection: keep-alive\r\n') + request('/health'))
+    assert [headers.get('Connection') for _, headers, _ in parse_responses(raw)] == ['keep-alive', None]
+
+def test_connection_close_stops_after_the_response(api):
+    raw = exchange(api, request('/health', headers='Connection: close\r\n') + request('/health'))
+    [(status, headers, _)] = parse_responses(raw)
+    assert status == 200 and headers['Connection'] == 'close'
+
+def test_other_methods_are_not_allowed(api):
+    [(status, headers, body)] = parse_responses(exchange(api, request('/v1/weeks', method='POST')))
+    assert status == 405 and headers['Allow'] == 'GET, HEAD'
+    assert 'error' in json.loads(body)
+
+def test_malformed_request_line_is_rejected(api):
+    [(status, headers, _)] = parse_responses(exchange(api, b'GET /v1/weeks\r\n\r\n' + request('/health')))
+    assert status == 400 and headers['Connection'] == 'close'
+
+def test_oversized_headers_are_rejected(api):
+    raw = exchange(api, request('/health', headers=f'X-Padding: {"a" * MAX_HEADER_BYTES}\r\n'))
+    [(status, headers, _)] = parse_responses(raw)
+    assert status == 431 and headers['Connection'] == 'close'
+
+def test_idle_and_partial_requests_are_closed(api):
+    assert exchange(api, b'', idle_timeout=0.2) == b''
+    assert exchange(api, b'GET /health HTTP/1.1\r\nHost:', idle_timeout=0.2) == b''
+    # A complete request is answered before the idle connection is closed
+    [(status, _, _)] = parse_responses(exchange(api, request('/health'), idle_timeout=0.2))
+    assert status == 200
+
+@pytest.mark.parametrize('target, status', [
+    ('/v1/unknown', 404),
+    ('/v1/weeks/99', 404),
+    ('/v1/weeks/abc', 404),
+    ('/v1/weeks/' + '9' * 5000, 404),
+    ('/v1/due-date', 400),
+    ('/v1/due-date?date=2026-03-01&type=other', 400),
+    ('/v1/diet', 400),
+    ('/v1/diet?trimester=2&restrictions=paleo', 400),
+    ('/v1/diet?trimester=2&meal_preference=5%20meals', 400),
+    ('/v1/exercises?trimester=4', 400),
+    ('/v1/exercises?trimester=1&types=juggling', 400),
+])
+def test_bad_requests_get_errors_without_caching(api, target, status):
+    response = api.handle(target)
+    assert response.status == status
+    assert response.etag is None
+    assert 'error' in json.loads(response.body)
+
+
+def test_due_date(api):
+    payload = json.loads(api.handle('/v1/due-date?date=2026-03-01&type=lmp&as_of=2026-06-01').body)
+    assert payload['due_date'] == '2026-12-06'
+    assert payload['week'] == 16
+
+def test_due_date_outside_the_pregnancy_has_no_week(api):
+    payload = json.loads(api.handle('/v1/due-date?date=9999-12-31&as_of=2026-06-01').body)
+    assert payload['week'] is None
+    payload = json.loads(api.handle('/v1/due-date?date=2020-01-01&as_of=2026-06-01').body)
+    assert payload['week'] is None
+
+def test_unexpected_errors_get_a_server_error(api, monkeypatch):
+    def fail(params):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(api, 'diet', fail)
+    [(status, _, body), (next_status, _, _)] = parse_responses(exchange(api, request('/v1/diet') + request('/health')))
+    assert status == 500 and 'error' in json.loads(body)
+    # The connection stays usable for the next request
+    assert next_status == 200
+
+def test_diet_aliases_share_a_response(api):
+    assert api.handle('/v1/diet?trimester=2') is api.handle('/v1/diet?trimester=Second%20Trimester&meal_preference=flexible')
+    payload = json.loads(api.handle('/v1/diet?trimester=1&restrictions=gluten-free').body)
+    assert all('Upma' not in meal['food'] for meal in payload['meals'])
+
+def test_exercise_subsets_are_built_on_demand_and_shared(api):
+    types = api.exercise_types
+    assert len(types) >= 2
+    api.exercise_response.cache_clear()
+    first = api.handle(f'/v1/exercises?trimester=3&types={types[0]},{types[1]}')
+    second = api.handle(f'/v1/exercises?trimester=third&types={types[1].upper()},{types[0]}')
+    assert first is second
+    assert api.exercise_response.cache_info().currsize == 1
+    exercises = json.loads(first.body)['exercises']
+    assert {exercise['exercise_type'] for exercise in exercises} <= {types[0], types[1]}
+    assert all(exercise['video_url'].endswith(exercise['video_id']) for exercise in exercises)
@@ -0,0 +1,180 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from rate_limit import ProviderLimiter, ServiceBusy, deadline
+
+
+def make_limiter(**limits):
+    settings = dict(rate=1000.0, burst=100, max_in_flight=4, max_waiting=8, wait_timeout=1, call_timeout=1)
+    settings.update(limits)
+    return ProviderLimiter('test', **settings)
+
+
+# Function returning a func that counts its calls and blocks until `release` is set
+def blocking_call(release, result='answer'):
+    calls = []
+
+    def func():
+        calls.append(1)
+        release.wait(5)
+        return result
+    return func, calls
+
+
+def test_identical_calls_share_one_upstream_call():
+    limiter = make_limiter()
+    release = threading.Event()
+    func, calls = blocking_call(release)
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(limiter.call, 'key', func) for _ in range(4)]
+        time.sleep(0.1)
+        release.set()
+        assert [future.result() for future in futures] == ['answer'] * 4
+    assert len(calls) == 1
+
+
+def test_duplicate_waits_for_a_leader_slower_than_the_wait_timeout():
+    limiter = make_limiter(wait_timeout=0.1, call_timeout=1)
+
+    def slow():
+        time.sleep(0.4)
+        return 'answer'
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(limiter.call, 'key', slow)
+        time.sleep(0.05)
+        follower = pool.submit(limiter.call, 'key', slow)
+        assert follower.result() == leader.result() == 'answer'
+
+
+def test_duplicate_gives_up_after_the_wait_and_call_timeouts():
+    limiter = make_limiter(wait_timeout=0.1, call_timeout=0.1)
+    release = threading.Event()
+    func, _ = blocking_call(release)
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(limiter.call, 'key', func)
+        time.sleep(0.05)
+        with pytest.raises(ServiceBusy):
+            limiter.call('key', func)
+        release.set()
+        assert leader.result() == 'answer'
+
+
+def test_leader_error_is_shared_with_duplicates():
+    limiter = make_limiter()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError('upstream failed')
+
+    with ThreadPoolExecutor(2) as pool:
+        futures = [pool.submit(limiter.call, 'key', failing) for _ in range(2)]
+        time.sleep(0.1)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match='upstream failed'):
+                future.result()
+
+
+def test_full_wait_queue_sheds_load():
+    limiter = make_limiter(max_in_flight=1, max_waiting=1, wait_timeout=1)
+    release = threading.Event()
+    func, _ = blocking_call(release)
+    with ThreadPoolExecutor(2) as pool:
+        running = pool.submit(limiter.call, 'running', func)
+        time.sleep(0.05)
+        queued = pool.submit(limiter.call, 'queued', func)
+        time.sleep(0.05)
+        with pytest.raises(ServiceBusy):
+            limiter.call('shed', func)
+        release.set()
+        assert running.result() == queued.result() == 'answer'
+
+
+def test_deadline_caps_the_slot_wait():
+    limiter = make_limiter(max_in_flight=1, wait_timeout=5)
+    release = threading.Event()
+    func, _ = blocking_call(release)
+    with ThreadPoolExecutor(1) as pool:
+        running = pool.submit(limiter.call, 'running', func)
+        time.sleep(0.05)
+        start = time.monotonic()
+        with deadline(time.monotonic() + 0.1), pytest.raises(ServiceBusy):
+            limiter.call('other', func)
+        assert time.monotonic() - start < 1
+        release.set()
+        running.result()
+
+
+# Function returning a streaming func that yields `chunks`, each once its event is set
+def gated_stream(chunks):
+    gates = [threading.Event() for _ in chunks]
+    calls = []
+
+    def func():
+        calls.append(1)
+        for chunk, gate in zip(chunks, gates):
+            gate.wait(5)
+            yield chunk
+    return func, gates, calls
+
+
+def test_identical_streams_share_one_upstream_stream():
+    limiter = make_limiter()
+    func, gates, calls = gated_stream(['a', 'b', 'c'])
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(lambda: list(limiter.stream('key', func)))
+        gates[0].set()
+        time.sleep(0.1)
+        # The duplicate joins after the first chunk and still receives the whole answer
+        follower = pool.submit(lambda: list(limiter.stream('key', func)))
+        time.sleep(0.1)
+        gates[1].set()
+        gates[2].set()
+        assert leader.result() == follower.result() == ['a', 'b', 'c']
+    assert len(calls) == 1
+
+
+def test_stream_error_is_shared_with_duplicates():
+    limiter = make_limiter()
+    release = threading.Event()
+
+    def failing():
+        yield 'a'
+        release.wait(5)
+        raise ValueError('stream failed')
+
+    with ThreadPoolExecutor(2) as pool:
+        futures = [pool.submit(lambda: list(limiter.stream('key', failing))) for _ in range(2)]
+        time.sleep(0.1)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match='stream failed'):
+                future.result()
+
+
+def test_duplicate_stream_is_busy_when_the_leader_stops_reading():
+    limiter = make_limiter()
+    func, gates, _ = gated_stream(['a', 'b'])
+    gates[0].set()
+    leader = limiter.stream('key', func)
+    assert next(leader) == 'a'
+    with ThreadPoolExecutor(1) as pool:
+        follower = pool.submit(lambda: list(limiter.stream('key', func)))
+        time.sleep(0.1)
+        leader.close()
+        with pytest.raises(ServiceBusy):
+            follower.result()
+
+
+def test_new_stream_starts_after_the_previous_one_ends():
+    limiter = make_limiter()
+    func, gates, calls = gated_stream(['a'])
+    gates[0].set()
+    assert list(limiter.stream('key', func)) == ['a']
+    assert list(limiter.stream('key', func)) == ['a']
+    assert len(calls) == 2
@@ -0,0 +1,58 @@
+import pytest
+
+from retrieval import RetrievalIndex
+
+WEEK_STORE = {
+    8: {
+        'week': 8,
+        'baby_development': 'Your baby is about the size of a raspberry.',
+        'symptoms': ['Nausea', 'Tiredness'],
+        'checklist': ['Book your first prenatal visit'],
+    },
+    12: {
+        'week': 12,
+        'baby_development': 'Your baby is about the size of a lime.',
+        'symptoms': ['Less nausea'],
+        'checklist': ['Schedule first trimester screening'],
+    },
+}
+
+
+@pytest.fixture
+def index():
+    passages = [
+        'Week 8 pregnancy symptoms: Nausea; Tiredness',
+        'Week 12 pregnancy checklist: Schedule first trimester screening',
+    ]
+    return RetrievalIndex(passages, WEEK_STORE)
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('What are the symptoms in week 8?', '**Week 8 pregnancy symptoms:**\n- Nausea\n- Tiredness'),
+    ('Symptoms of week 8', '**Week 8 pregnancy symptoms:**\n- Nausea\n- Tiredness'),
+    ('How is my baby developing in the 12th week?', '**Week 12 baby development:** Your baby is about the size of a lime.'),
+    ('What should I do in week 12?', '**Week 12 pregnancy checklist:**\n- Schedule first trimester screening'),
+])
+def test_direct_answer_for_plain_week_questions(index, query, expected):
+    assert index.direct_answer(query) == expected
+
+
+@pytest.mark.parametrize('query', [
+    'I am bleeding heavily in week 8, what should I do?',
+    'Is spotting a sign of miscarriage in week 8?',
+    'Is it safe to drink coffee in week 12? I feel tired',
+    'I feel severe cramps in week 8',
+    'Is my baby growing too slowly in week 12?',
+    'What are the symptoms in week 8 and week 12?',
+    'What are the symptoms and the checklist for week 8?',
+    'What are the symptoms in week 30?',
+    'What are common pregnancy symptoms?',
+])
+def test_no_direct_answer_when_the_question_says_more(index, query):
+    assert index.direct_answer(query) is None
+
+
+def test_grounded_prompt_includes_matching_passages(index):
+    prompt = index.grounded_prompt('nausea tiredness')
+    assert 'Week 8 pregnancy symptoms: Nausea; Tiredness' in prompt
+    assert prompt.endswith('Question: nausea tiredness')
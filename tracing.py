@@ -0,0 +1,164 @@
+import bisect
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set TRACE_SPANS=0 to turn span timing off entirely
+SPANS_ENABLED = os.getenv('TRACE_SPANS', '1') != '0'
+# Set PROFILE_RERUNS=1 to run each page rerun under cProfile, writing stats to PROFILE_DIR
+PROFILE_RERUNS = os.getenv('PROFILE_RERUNS', '0') == '1'
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+# Set TRACE_JSONL to a file path to append a metrics snapshot after each rerun
+TRACE_JSONL = os.getenv('TRACE_JSONL')
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+_histograms = {}
+_lock = threading.Lock()
+_null_span = nullcontext()
+
+def record(name, seconds):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+@contextmanager
+def _timed_span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+# Function to time a block of code as a named span
+def span(name):
+    return _timed_span(name) if SPANS_ENABLED else _null_span
+
+# Decorator timing every call of a function as a named span
+def traced(name):
+    def decorator(func):
+        if not SPANS_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _timed_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Function to return the aggregated histograms as plain dicts
+def snapshot():
+    with _lock:
+        return {
+            name: {'count': histogram.count, 'sum_seconds': histogram.sum, 'buckets': list(histogram.counts)}
+            for name, histogram in _histograms.items()
+        }
+
+# Function to render the histograms in the Prometheus text exposition format
+def prometheus_text():
+    lines = [
+        '# HELP glowing_span_duration_seconds Time spent in each traced span.',
+        '# TYPE glowing_span_duration_seconds histogram',
+    ]
+    for name, data in sorted(snapshot().items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), data['buckets']):
+            cumulative += count
+            lines.append(f'glowing_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'glowing_span_duration_seconds_sum{{span="{name}"}} {data["sum_seconds"]:.6f}')
+        lines.append(f'glowing_span_duration_seconds_count{{span="{name}"}} {data["count"]}')
+    return '\n'.join(lines) + '\n'
+
+# Function to append one metrics snapshot as a JSON line
+def append_jsonl(path, page=None):
+    line = json.dumps({'timestamp': time.time(), 'page': page, 'spans': snapshot()})
+    with _lock, open(path, 'a') as file:
+        file.write(line + '\n')
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_metrics_server = None
+
+# Function to serve the Prometheus metrics on a port from a background thread, once per process
+def start_metrics_server(port, host='127.0.0.1'):
+    global _metrics_server
+    with _lock:
+        if _metrics_server is None:
+            _metrics_server = ThreadingHTTPServer((host, port), MetricsHandler)
+            threading.Thread(target=_metrics_server.serve_forever, daemon=True, name='metrics').start()
+    return _metrics_server
+
+
+# Per-rerun tracing: times the whole rerun, optionally profiles it, and exports the metrics.
+# Used as a context manager around the page body, so finish() also runs when the rerun is
+# cut short by st.rerun(), st.stop() or an exception.
+class Rerun:
+    def __init__(self, page):
+        self.page = page
+        self.start = time.perf_counter()
+        self.profiler = None
+        if PROFILE_RERUNS:
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError:
+                # Another rerun is already being profiled
+                self.profiler = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.finish()
+        return False
+
+    def finish(self):
+        if SPANS_ENABLED:
+            record(f'{self.page}.rerun', time.perf_counter() - self.start)
+        if self.profiler is not None:
+            self.profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            self.profiler.dump_stats(os.path.join(PROFILE_DIR, f'{self.page}-{time.strftime("%Y%m%d-%H%M%S")}-{id(self)}.prof'))
+        if TRACE_JSONL:
+            append_jsonl(TRACE_JSONL, self.page)
+
+# Function to start tracing a page rerun; the METRICS_PORT environment variable starts the metrics endpoint
+def start_rerun(page):
+    port = os.getenv('METRICS_PORT')
+    if port:
+        start_metrics_server(int(port))
+    return Rerun(page)
@@ -0,0 +1,115 @@
+import json
+
+import plotly.graph_objects as go
+
+# Weeks covered by the tracker charts
+CHART_WEEKS = range(1, 42)
+
+# Function to display doughnut chart
+def plot_doughnut_chart(percentage_completed):
+    fig = go.Figure(go.Pie(
+        values=[percentage_completed, 100 - percentage_completed],
+        labels=['Completed', 'Remaining'],
+        hole=.7,
+        marker=dict(colors=['#1db954', '#dddddd']),
+        textinfo='none',  # Hide all text in the slices
+        sort=False,  # Disable sorting to maintain order
+        direction='clockwise'  # Set the direction to clockwise
+    ))
+
+    fig.update_layout(
+        title_text='Pregnancy Progress',
+        title_font=dict(size=24),  # Increase font size of the title
+        annotations=[dict(text=f'{percentage_completed:.1f}% Completed', x=0.5, y=0.5, font_size=20, showarrow=False)],
+        showlegend=False,
+        margin=dict(l=0, r=0, t=40, b=0), # Reduce margins to minimize space
+        height=300
+    )
+    
+    return fig
+
+# Function to display vertical progress bar using HTML and CSS
+def display_vertical_progress_bar(percentage_completed):
+    progress_style = f"""
+    <style>
+    .progress-container {{
+        width: 40px;
+        height: 260px;
+        background-color: #ddd;
+        border-radius: 5px;
+        margin: 0 auto;
+        display: flex;
+        flex-direction: column;
+        justify-content: flex-start;
+        position: relative;
+        top: 40px;
+    }}
+    .progress-bar {{
+        width: 100%;
+        height: {percentage_completed}%;
+        background-color: #1db954;
+        border-radius: 5px 5px 0 0;
+    }}
+    .progress-marker {{
+        width: 100%;
+        height: 5px;
+        background-color: black;
+        position: absolute;
+        left: 0;
+    }}
+    .marker1 {{
+        top: 33.3%;
+    }}
+    .marker2 {{
+        top: 66.6%;
+    }}
+    .marker3 {{
+        top: 99%;
+    }}
+    .label {{
+        position: absolute;
+        width: 200px;
+        left: 74px;
+        font-size: 20px;
+        font-weight: 500;
+        transform: translateY(-50%);
+    }}
+    .label1 {{
+        top: 16.65%;
+    }}
+    .label2 {{
+        top: 50%;
+    }}
+    .label3 {{
+        top: 82.95%;
+    }}
+    </style>
+    """
+    progress_html = f"""
+    <div class="progress-container">
+        <div class="progress-bar"></div>
+        <div class="progress-marker marker1"></div>
+        <div class="progress-marker marker2"></div>
+        <div class="progress-marker marker3"></div>
+        <div class="label label1">First Trimester</div>
+        <div class="label label2">Second Trimester</div>
+        <div class="label label3">Third Trimester</div>
+    </div>
+    """
+    return progress_style + progress_html
+
+# Function to convert a week number into the percentage of a 40 week pregnancy
+def week_percentage(week_number):
+    return (week_number / 40) * 100
+
+# Function to precompute the serialized doughnut chart and the progress bar HTML for every week
+def build_week_charts():
+    return {
+        week: (plot_doughnut_chart(week_percentage(week)).to_json(), display_vertical_progress_bar(week_percentage(week)))
+        for week in CHART_WEEKS
+    }
+
+# Function to get a fresh copy of the precomputed doughnut chart, so sessions never share a figure.
+# The JSON was produced by a validated figure, so the copy skips Plotly's validation.
+def doughnut_chart_for_week(week_charts, week_number):
+    return go.Figure(json.loads(week_charts[week_number][0]), _validate=False)
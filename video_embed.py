@@ -0,0 +1,25 @@
+from html import escape
+
+# Styles for the click-to-load player: only a thumbnail and a play button load until clicked
+PLAYER_DOC_STYLE = (
+    "<style>*{padding:0;margin:0;overflow:hidden}html,body{height:100%}"
+    "img,span{position:absolute;width:100%;top:0;bottom:0;margin:auto}"
+    "img{height:100%;object-fit:cover}"
+    "span{height:1.5em;text-align:center;font:48px/1.5 sans-serif;color:white;text-shadow:0 0 0.5em black}</style>"
+)
+
+# Function to build a lazily loaded YouTube embed that shows a thumbnail until clicked
+def lazy_youtube_embed(video_id, title='YouTube video player', width=360, height=200):
+    video_id = escape(str(video_id), quote=True)
+    player_doc = (
+        f"{PLAYER_DOC_STYLE}<a href='https://www.youtube.com/embed/{video_id}?autoplay=1'>"
+        f"<img src='https://i.ytimg.com/vi/{video_id}/hqdefault.jpg' alt='{escape(title, quote=True)}' loading='lazy'>"
+        "<span>&#9654;</span></a>"
+    )
+    return (
+        f'<iframe width="{width}" height="{height}" loading="lazy" '
+        f'src="https://www.youtube.com/embed/{video_id}?autoplay=1" srcdoc="{escape(player_doc, quote=True)}" '
+        f'title="{escape(title, quote=True)}" frameborder="0" '
+        'allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" '
+        'referrerpolicy="strict-origin-when-cross-origin" allowfullscreen></iframe>'
+    )
@@ -0,0 +1,67 @@
+from image_cache import render_image
+
+# CSS style shared by every week card
+CARD_STYLE = """
+<style>
+.card {
+    border: 1px solid #ccc;
+    border-radius: 8px;
+    padding: 15px;
+    margin-bottom: 15px;
+    box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1);
+}
+.card p {
+    margin: 0;
+}
+.card ul {
+    margin-top: 5px;
+    padding-left: 20px;
+}
+.images-container {
+    display: flex;
+    justify-content: flex-start;
+    margin-top: 15px;
+}
+.card-img {
+    height: 20rem;
+    width: 20rem;
+    border-radius: 8px;
+    box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1);
+}
+</style>
+"""
+
+# Function to split a ';' separated cell into a list of trimmed entries
+def split_entries(value):
+    return [entry.strip() for entry in str(value).split(';') if entry.strip()]
+
+# Function to render a list of entries as a card with a bullet list
+def render_list_card(entries):
+    items = ''.join(f'<li>{entry}</li>' for entry in entries)
+    return f"<div class='card'><ul>{items}</ul></div>"
+
+# Function to render the images row, using local thumbnails for images listed in the manifest
+def render_images(image_urls, image_manifest=None):
+    images = ''.join(render_image(image_url, image_manifest or {}) for image_url in image_urls)
+    return f"<div class='images-container'>{images}</div>"
+
+# Function to build the content entry for a single row of weeks.csv
+def build_week_entry(row, image_manifest=None):
+    symptoms = split_entries(row['pregnancySymptoms'])
+    checklist = split_entries(row['pregnancyChecklist'])
+    images = split_entries(row['images'])
+    return {
+        'week': int(row['week']),
+        'baby_development': row['babyDevelopment'],
+        'symptoms': symptoms,
+        'checklist': checklist,
+        'images': images,
+        'development_html': f"<div class='card'>{row['babyDevelopment']}</div>",
+        'symptoms_html': render_list_card(symptoms),
+        'checklist_html': render_list_card(checklist),
+        'images_html': render_images(images, image_manifest),
+    }
+
+# Function to index the weeks table once into a dict keyed by the week column
+def build_week_store(dataset, image_manifest=None):
+    return {entry['week']: entry for entry in (build_week_entry(row, image_manifest) for row in dataset.to_dict('records'))}
@@ -0,0 +1,119 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from answer_cache import normalize_query
+
+# Quota units charged by the YouTube Data API for one search().list call
+SEARCH_COST = 100
+# The daily quota resets at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+
+
+# Tracks the YouTube Data API units spent today in SQLite, so the count survives restarts
+# and is shared by every process using the same file
+class QuotaBudget:
+    def __init__(self, path=':memory:', daily_quota=10000, reserve=500):
+        self.daily_quota = daily_quota
+        self.reserve = reserve
+        self._lock = threading.Lock()
+        # Transactions are opened explicitly, so spending is atomic across processes
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS quota (day TEXT PRIMARY KEY, used INTEGER NOT NULL)')
+
+    def _today(self):
+        return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+    def _used(self, day):
+        row = self._conn.execute('SELECT used FROM quota WHERE day = ?', (day,)).fetchone()
+        return row[0] if row else 0
+
+    # Reserve units for a call, returning False when the budget is nearly used up
+    def try_spend(self, cost):
+        day = self._today()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                used = self._used(day)
+                if used + cost > self.daily_quota - self.reserve:
+                    return False
+                self._conn.execute('INSERT OR REPLACE INTO quota (day, used) VALUES (?, ?)', (day, used + cost))
+                # Earlier days are no longer needed
+                self._conn.execute('DELETE FROM quota WHERE day < ?', (day,))
+            finally:
+                self._conn.execute('COMMIT')
+            return True
+
+    def remaining(self):
+        with self._lock:
+            return self.daily_quota - self._used(self._today())
+
+
+# YouTube video search with a reusable client, a per-query TTL cache and a quota budget
+class YouTubeSearch:
+    def __init__(self, api_key, max_results=3, cache_ttl=24 * 3600, cache_size=1000, budget=None, limiter=None, timeout=10):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.limiter = limiter
+        self.max_results = max_results
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.budget = budget or QuotaBudget()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # The client's HTTP transport is not thread safe, so each worker thread keeps its own
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            import httplib2
+            from googleapiclient.discovery import build
+
+            # Use the discovery document bundled with google-api-python-client, so no fetch happens.
+            # httplib2 would otherwise wait up to 60 seconds for a slow response.
+            client = build('youtube', 'v3', developerKey=self.api_key, static_discovery=True, cache_discovery=False,
+                           http=httplib2.Http(timeout=self.timeout))
+            self._local.client = client
+        return client
+
+    def search(self, query):
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+        if entry is not None and time.monotonic() - entry[0] <= self.cache_ttl:
+            return entry[1]
+
+        if self.limiter is not None:
+            items = self.limiter.call(key, self._search, query, entry)
+        else:
+            items = self._search(query, entry)
+        if entry is not None and items is entry[1]:
+            return items
+
+        with self._lock:
+            self._cache[key] = (time.monotonic(), items)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return items
+
+    def _search(self, query, entry):
+        if not self.budget.try_spend(SEARCH_COST):
+            # Serve stale results rather than spending the last of the quota
+            if entry is not None:
+                return entry[1]
+            raise RuntimeError("The daily YouTube quota is nearly used up. Please try again later.")
+
+        request = self._client().search().list(
+            q=query,
+            part='snippet',
+            type='video',
+            maxResults=self.max_results
+        )
+        return request.execute().get('items', [])